@@ -3,21 +3,34 @@
 uvicorn backend.deploy_server:app --reload
 '''
 
-from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import JSONResponse
-from pydub import AudioSegment
-from joblib import load
+from fastapi import FastAPI, File, UploadFile, Form, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional
 import numpy as np
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import glob
 import io
+import json
 import os
-import tempfile
-from scipy.io.wavfile import write
-import requests
-from svm_.classification import classify_audio
+import soundfile as sf
+import time
+from svm_ import instrumentation
+from svm_.instrumentation import stage
+from svm_.audio_io import StreamResampler
+from svm_.feature_engine import ANALYSIS_SR
+from svm_.feature_extraction import select_families
+from svm_.notifier import BulbNotifier
+from svm_.classification import predict_features, classify_features
+from svm_.runtime import InferenceRuntime
+from svm_.inference_pool import InferencePool, QueueFull, extract_file_features_job, featurise_sources_job
+from svm_.micro_batch import MicroBatcher
+from svm_.prediction_cache import PredictionCache
+from svm_.streaming import StreamingFeatureExtractor
 
 base_path = "/app/"
 data_dir = os.path.join(base_path, "equipment_sound_dataset")
-sample_rate = 44100  # Replace with the actual sample rate of your audio
 
 
 ##############################################
@@ -32,33 +45,143 @@ PARTICLE_DEVICE_ID = 'e00fce687d5dac10819a7918'
 PARTICLE_ACCESS_TOKEN = 'd22576aded5b7474f866a23fadf4ded7f969b2fd'
 PARTICLE_FUNCTION = 'setColor'
 
-def send_color_to_bulb(color):
-    try:
-        url = f"https://api.particle.io/v1/devices/{PARTICLE_DEVICE_ID}/{PARTICLE_FUNCTION}"
-        print(url)
-        data = {
-            'arg': color,
-            'access_token': PARTICLE_ACCESS_TOKEN
-        }
-        response = requests.post(url, data=data)
-        print(response.status_code)
-        print(response.text)
-        if response.status_code == 200:
-            print(f"Bulb color set to: {color}")
-        else:
-            print("Failed to send color to bulb:", response.text)
-    except Exception as e:
-        print("Error sending color to bulb:", e)
+# Colour changes are sent from a background thread with pooled connections,
+# timeouts and retries; set PARTICLE_API_URL to point at a stub server.
+bulb_notifier = BulbNotifier(PARTICLE_DEVICE_ID, PARTICLE_ACCESS_TOKEN, PARTICLE_FUNCTION)
 ##############################################
 
 
 app = FastAPI()
-model = load(os.path.join(base_path, "models", "svm_model.joblib"))
+# Inference-only runtime: loads the compiled model when it exists (so scikit-learn is
+# never imported) and is warmed up before the first request arrives
+# MODEL_PATH selects another artifact, e.g. models/large_scale_model.bin from svm_.large_scale
+model_path = os.environ.get("MODEL_PATH", os.path.join(base_path, "models"))
+# Only svm_model.bin is served unless ALLOW_PICKLED_MODEL=1 lets a joblib model stand in for it
+allow_pickled_model = os.environ.get("ALLOW_PICKLED_MODEL", "0") == "1"
+runtime = InferenceRuntime.from_path(model_path, allow_pickle=allow_pickled_model)
+runtime.warmup()
+model = runtime.model
+class_names = runtime.class_names
+
+# Feature extraction runs on a bounded worker pool, not on the event loop.
+# INFERENCE_EXECUTOR: 'process' or 'thread'; requests beyond workers + queue depth get a 503.
+inference_pool = InferencePool(
+    workers=int(os.environ.get("INFERENCE_WORKERS", os.cpu_count() or 1)),
+    queue_depth=int(os.environ.get("INFERENCE_QUEUE_DEPTH", 32)),
+    kind=os.environ.get("INFERENCE_EXECUTOR", "process"),
+)
+
+# Streams keep their extractor state in the server process, so they run on their own threads:
+# one per stream, at most MAX_STREAMS streams; further connections are closed with 1013
+max_streams = int(os.environ.get("MAX_STREAMS", inference_pool.workers))
+stream_executor = ThreadPoolExecutor(max_workers=max_streams, thread_name_prefix='stream')
+stream_stats = {'max_streams': max_streams, 'active': 0, 'rejected': 0}
+
+# Feature vectors from concurrent requests are classified together in one pipeline call
+predict_batcher = MicroBatcher(
+    lambda features: predict_features(model, features, class_names),
+    max_batch_size=int(os.environ.get("PREDICT_BATCH_SIZE", 32)),
+    max_wait_ms=float(os.environ.get("PREDICT_BATCH_WAIT_MS", 5)),
+)
+
+# Results for uploads already seen (device retries, re-uploads after a reconnect), keyed by
+# the hash of the uploaded bytes and the model version; PREDICTION_CACHE_SIZE=0 disables it
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL", 600)),
+)
+pending_uploads = {}  # cache key -> task classifying that upload right now
+
+
+# INSTRUMENTATION=1: per-stage latency histograms on /metrics and a Server-Timing
+# header with each request's breakdown. Off by default; stages are then no-ops.
+if instrumentation.ENABLED:
+    @app.middleware("http")
+    async def time_request(request: Request, call_next):
+        timings = instrumentation.start_request()
+        start = time.perf_counter()
+        response = await call_next(request)
+        seconds = time.perf_counter() - start
+        labels = (('path', request.url.path),)
+        instrumentation.observe_histogram('aimechanics_request_seconds', labels, seconds)
+        instrumentation.increment('aimechanics_requests_total', labels + (('status', response.status_code),))
+        # Streaming responses are still running here; their breakdown stops at the first byte
+        response.headers['Server-Timing'] = instrumentation.server_timing(dict(timings, total=seconds))
+        return response
+
+
+def overloaded_response(e):
+    return JSONResponse({"error": f"Server busy: {e}"}, status_code=503, headers={"Retry-After": "1"})
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    inference_pool.shutdown()
+    stream_executor.shutdown(wait=False, cancel_futures=True)
+    bulb_notifier.close()
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Audio Classification API. Use the /predict endpoint to classify audio files."}
 
+@app.get("/stats")
+async def stats():
+    return {
+        "inference": inference_pool.stats(),
+        "predict_batching": predict_batcher.stats(),
+        "bulb_notifier": bulb_notifier.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "streams": dict(stream_stats),
+        "model_version": runtime.model_version,
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage and request latency histograms, request and job counters, and pool gauges"""
+    pool = inference_pool.stats()
+    batching = predict_batcher.stats()
+    notifier = bulb_notifier.stats()
+    cache = prediction_cache.stats()
+    gauges = {
+        'aimechanics_inference_in_flight': pool['in_flight'],
+        'aimechanics_inference_queued': pool['queued'],
+        'aimechanics_prediction_cache_entries': cache['entries'],
+        'aimechanics_bulb_pending': notifier['pending'],
+        'aimechanics_streams_active': stream_stats['active'],
+    }
+    totals = {
+        'aimechanics_inference_completed_total': pool['completed'],
+        'aimechanics_inference_failed_total': pool['failed'],
+        'aimechanics_inference_rejected_total': pool['rejected'],
+        'aimechanics_predict_batches_total': batching['batches'],
+        'aimechanics_predict_batch_items_total': batching['items'],
+        'aimechanics_prediction_cache_hits_total': cache['hits'],
+        'aimechanics_prediction_cache_misses_total': cache['misses'],
+        'aimechanics_bulb_sent_total': notifier['sent'],
+        'aimechanics_bulb_skipped_total': notifier['skipped'],
+        'aimechanics_bulb_failed_total': notifier['failed'],
+        'aimechanics_streams_rejected_total': stream_stats['rejected'],
+    }
+    return PlainTextResponse(instrumentation.render_prometheus(gauges, totals),
+                             media_type="text/plain; version=0.0.4")
+
+@app.post("/reload_model")
+async def reload_model():
+    """Load the model files again (e.g. after retraining) and drop cached predictions"""
+    global runtime, model, class_names
+    previous_version = runtime.model_version
+    try:
+        loop = asyncio.get_running_loop()
+        new_runtime = await loop.run_in_executor(
+            None, lambda: InferenceRuntime.from_path(model_path, allow_pickle=allow_pickled_model))
+        await loop.run_in_executor(None, new_runtime.warmup)
+    except Exception as e:
+        return JSONResponse({"error": f"Model reload failed: {e}"}, status_code=500)
+
+    runtime, model, class_names = new_runtime, new_runtime.model, new_runtime.class_names
+    prediction_cache.clear()
+    return {"previous_version": previous_version, "model_version": runtime.model_version}
+
 @app.post("/predict_path")
 async def predict(file_path: str = Form(...)):
     print("==========================================")
@@ -69,46 +192,91 @@ async def predict(file_path: str = Form(...)):
         if not os.path.exists(file_path):
             return JSONResponse({"error": "File not found"}, status_code=400)
         
-        # Call classify_audio with the provided file path
-        clas_result = classify_audio(model, file_path, ['normal', 'early_fault', 'failure'])
+        # Extract features from the provided file path, then classify them in the next batch
+        features = await inference_pool.run(extract_file_features_job, file_path, runtime.feature_families)
+        with stage('predict'):
+            clas_result = await predict_batcher.submit(features)
 
         # Convert NumPy array to list for JSON serialization
         clas_result['probabilities'] = clas_result['probabilities'].tolist()
 
         # Return the prediction result
         return JSONResponse({"prediction": clas_result})
+    except QueueFull as e:
+        return overloaded_response(e)
     except Exception as e:
         # Handle errors and return a 500 response
         return JSONResponse({"error": str(e)}, status_code=500)
     
 
-@app.post("/equip_diagnostic")
-async def predict(file: UploadFile = File(...)):
-    print("==========================================")
-    print("URL for uploading audio data to the server")
-    print("==========================================")
+def archive_audio(data):
+    """Write the last uploaded recording to f'{base_path}/recorded_audio/' (runs after the response).
+    The uploaded bytes are kept as they are, so nothing is decoded a second time;
+    only the header is read, for the file extension."""
     try:
-        # Save the uploaded file to a temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            temp_file_path = temp_file.name
-            temp_file.write(await file.read())
+        with stage('archive_write'):
+            extension = sf.info(io.BytesIO(data)).format.lower()
+            os.makedirs(os.path.join(base_path, 'recorded_audio'), exist_ok=True)
+            output_file_path = os.path.join(base_path, 'recorded_audio', f'output_audio.{extension}')
+            with open(output_file_path, 'wb') as f:
+                f.write(data)
+    except Exception as e:
+        print("Error archiving audio:", e)
 
-        # =========> Call the SVM Model for classification <========= #
-        # Call classify_audio with the temporary file path
-        class_result = classify_audio(model, temp_file_path, ['normal', 'early_fault', 'failure']) 
-        # =========> Return the classification <================ # 
 
-        # Convert NumPy array to list for JSON serialization
-        class_result['probabilities'] = class_result['probabilities'].tolist()
+async def classify_upload(data, background_tasks):
+    """Decode and classify uploaded bytes; the recording is archived after the response"""
+    # =========> Call the SVM Model for classification <========= #
+    # The worker decodes the upload at the analysis rate, off the event loop
+    features = await inference_pool.run(extract_file_features_job, data, runtime.feature_families)
+    with stage('predict'):
+        class_result = await predict_batcher.submit(features)
+    # =========> Return the classification <================ # 
+
+    # Convert NumPy array to list for JSON serialization
+    class_result['probabilities'] = class_result['probabilities'].tolist()
+
+    # Archive the recording once the response has been sent
+    background_tasks.add_task(archive_audio, data)
+    return class_result
+
 
-        # write the temporary file to the f'{base_path}/dataset/recorded_audio/' directory
-        audio_data = AudioSegment.from_file(temp_file_path).get_array_of_samples()
-        os.makedirs(os.path.join(base_path, 'recorded_audio'), exist_ok=True)
-        output_file_path = os.path.join(base_path, 'recorded_audio', 'output_audio.wav')
-        write(output_file_path, sample_rate, np.array(audio_data))
+async def cached_classify_upload(data, background_tasks):
+    """
+    classify_upload through the prediction cache. A repeated upload is answered
+    from the cache (it was archived the first time); one arriving while the
+    same bytes are still being classified waits for that result instead of
+    starting a second classification.
+    """
+    if not prediction_cache.enabled:
+        return await classify_upload(data, background_tasks)
 
-        # Clean up the temporary file
-        os.remove(temp_file_path)
+    key = PredictionCache.key(data, runtime.model_version)
+    class_result = prediction_cache.get(key)
+    if class_result is not None:
+        return class_result
+    if key in pending_uploads:
+        return copy.deepcopy(await asyncio.shield(pending_uploads[key]))
+
+    task = asyncio.ensure_future(classify_upload(data, background_tasks))
+    pending_uploads[key] = task
+    try:
+        class_result = await asyncio.shield(task)
+    finally:
+        pending_uploads.pop(key, None)
+    prediction_cache.put(key, class_result)
+    return class_result
+
+
+@app.post("/equip_diagnostic")
+async def predict(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    print("==========================================")
+    print("URL for uploading audio data to the server")
+    print("==========================================")
+    try:
+        with stage('upload_read'):
+            data = await file.read()
+        class_result = await cached_classify_upload(data, background_tasks)
 
         predicted_class = class_result['predicted_class']
         predicted_color = {
@@ -116,15 +284,132 @@ async def predict(file: UploadFile = File(...)):
             'early_fault': 'yellow',
             'failure': 'red'
         }.get(predicted_class)
-        send_color_to_bulb(predicted_color)
+        bulb_notifier.notify(predicted_color)
 
         # Return the prediction result
         return JSONResponse({"prediction": class_result})
+    except QueueFull as e:
+        return overloaded_response(e)
     except Exception as e:
         # Handle errors and return a 500 response
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+def batch_result_line(result):
+    """One NDJSON line per classified file"""
+    if 'probabilities' in result:
+        result['probabilities'] = result['probabilities'].tolist()
+    return json.dumps(result) + "\n"
+
+
+async def stream_batch(names, sources, chunk_size):
+    """
+    Featurise `sources` chunk by chunk on the inference pool - up to one chunk
+    per worker at a time - and yield each file's result as soon as its chunk is done.
+    Results can arrive out of order; every line carries the file's index.
+    Each chunk is classified with one model call, in a thread off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = [range(start, min(start + chunk_size, len(sources))) for start in range(0, len(sources), chunk_size)]
+    running = {}
+    errors = 0
+    
+    while chunks or running:
+        while chunks and len(running) < inference_pool.workers:
+            indices = chunks.pop(0)
+            task = asyncio.ensure_future(inference_pool.run(featurise_sources_job, [sources[i] for i in indices],
+                                                            runtime.feature_families))
+            running[task] = indices
+        
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            indices = running.pop(task)
+            indexed_names = [(i, names[i]) for i in indices]
+            try:
+                results = await loop.run_in_executor(
+                    None, classify_features, model, indexed_names, task.result(), class_names)
+            except Exception as e:
+                results = [{'index': i, 'source': name, 'error': str(e)} for i, name in indexed_names]
+            for result in results:
+                errors += 'error' in result
+                yield batch_result_line(result)
+    
+    yield json.dumps({'done': True, 'count': len(sources), 'errors': errors}) + "\n"
+
+
+@app.post("/predict_batch")
+async def predict_batch(files: Optional[List[UploadFile]] = File(None), dir_path: Optional[str] = Form(None),
+                        chunk_size: int = Form(16)):
+    """
+    Classify many files in one request: either a multi-file upload (`files`) or
+    every .wav file under a server-side directory (`dir_path`). Results are streamed
+    back as NDJSON, one line per file, followed by a summary line.
+    """
+    print("==========================================")
+    print("URL for classifying a batch of audio files")
+    print("==========================================")
+    if files:
+        names = [file.filename for file in files]
+        # Read the uploads now; they are closed once this handler returns
+        sources = [await file.read() for file in files]
+    elif dir_path:
+        if not os.path.isdir(dir_path):
+            return JSONResponse({"error": "Directory not found"}, status_code=400)
+        names = sorted(glob.glob(os.path.join(dir_path, "**", "*.wav"), recursive=True))
+        sources = names
+    else:
+        return JSONResponse({"error": "Provide files or dir_path"}, status_code=400)
+    
+    return StreamingResponse(stream_batch(names, sources, max(1, chunk_size)), media_type="application/x-ndjson")
+
+
+@app.websocket("/ws/stream")
+async def stream(websocket: WebSocket, sample_rate: int = 44100, dtype: str = "int16",
+                 window: float = 5.0, hop: float = 0.5):
+    """
+    Continuous monitoring: the client sends mono PCM frames (int16 or float32, little-endian)
+    as binary messages, and receives one JSON classification of the last `window`
+    seconds every `hop` seconds of audio.
+    """
+    await websocket.accept()
+    if dtype not in ("int16", "float32"):
+        await websocket.close(code=1003, reason="dtype must be int16 or float32")
+        return
+    try:
+        # Frames are resampled to the analysis rate as they arrive
+        resampler = StreamResampler(sample_rate, ANALYSIS_SR or sample_rate)
+        extractor = StreamingFeatureExtractor(ANALYSIS_SR or sample_rate, window_seconds=window, hop_seconds=hop)
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+    if stream_stats['active'] >= max_streams:
+        stream_stats['rejected'] += 1
+        await websocket.close(code=1013, reason=f"{max_streams} streams already open, try again later")
+        return
+    
+    loop = asyncio.get_running_loop()
+    stream_stats['active'] += 1
+    try:
+        while True:
+            samples = np.frombuffer(await websocket.receive_bytes(), dtype="<i2" if dtype == "int16" else "<f4")
+            if dtype == "int16":
+                samples = samples.astype(np.float32) / 32768
+            
+            # Only the new audio is resampled and transformed; a vector comes back for every completed hop
+            hops = await loop.run_in_executor(stream_executor, lambda: extractor.push(resampler.push(samples)))
+            for stream_time, features in hops:
+                # The stream extractor yields full vectors; keep the model's feature families
+                features = select_families(features[np.newaxis, :], runtime.feature_families)[0]
+                class_result = await predict_batcher.submit(features)
+                class_result['probabilities'] = class_result['probabilities'].tolist()
+                bulb_notifier.notify(color.get(class_result['predicted_class']))
+                await websocket.send_json({"time": stream_time, "prediction": class_result})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream_stats['active'] -= 1
+
+
 '''
     Docker Deployment
     docker build -t backend .
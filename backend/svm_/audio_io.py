@@ -0,0 +1,153 @@
+import io
+import struct
+
+import numpy as np
+import soundfile as sf
+
+from svm_.instrumentation import stage
+
+# WAVE format tags
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Sample widths the memory-mapped reader handles, and the scale libsndfile
+# applies when converting them to float
+_PCM_DTYPES = {
+    (WAVE_FORMAT_PCM, 16): ('<i2', 1.0 / 0x8000),
+    (WAVE_FORMAT_PCM, 32): ('<i4', 1.0 / 0x80000000),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): ('<f4', None),
+}
+
+
+# soxr quality preset, as librosa's default res_type='soxr_hq'
+RESAMPLE_QUALITY = 'HQ'
+
+
+def load_audio(source, sr=None):
+    """
+    Decode audio to a float32 mono waveform, returning (audio, sr) - the same
+    values as librosa.load(source, sr=sr). With sr=None the native sample rate
+    is kept; otherwise the waveform is resampled to sr.
+
+    source may be a file path, raw file bytes or a binary file-like object.
+    Plain 16/32-bit PCM and float WAV files on disk are memory-mapped and
+    converted in one pass; other files soundfile can read go through it
+    directly; anything else falls back to librosa.
+    """
+    audio, native_sr = _decode(source)
+    if sr is None:
+        return audio, native_sr
+    return resample(audio, native_sr, sr), sr
+
+
+def resample(audio, orig_sr, target_sr):
+    """Resample a float32 waveform with soxr's polyphase resampler (a no-op at the same rate)"""
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    import soxr
+    with stage('resample'):
+        return soxr.resample(audio, orig_sr, target_sr, quality=RESAMPLE_QUALITY)
+
+
+class StreamResampler:
+    """Resamples a continuous stream chunk by chunk, keeping filter state between chunks"""
+
+    def __init__(self, orig_sr, target_sr):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self._stream = None
+        if orig_sr != target_sr:
+            import soxr
+            self._stream = soxr.ResampleStream(orig_sr, target_sr, 1, dtype='float32', quality=RESAMPLE_QUALITY)
+
+    def push(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if self._stream is None:
+            return samples
+        return self._stream.resample_chunk(samples)
+
+
+def _decode(source):
+    """(audio, sr) at the native sample rate"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    if isinstance(source, str):
+        decoded = _read_pcm_wav(source)
+        if decoded is not None:
+            return decoded
+
+    try:
+        audio, sr = sf.read(source, dtype='float32', always_2d=True)
+    except sf.LibsndfileError:
+        import librosa
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return librosa.load(source, sr=None)
+
+    return _to_mono(audio), sr
+
+
+def _to_mono(audio):
+    """(n_samples, n_channels) -> (n_samples,), averaging channels like librosa.to_mono"""
+    if audio.shape[1] == 1:
+        return audio[:, 0]
+    return np.mean(audio, axis=1, dtype=np.float32)
+
+
+def _read_pcm_wav(path):
+    """Memory-map the data chunk of a plain PCM/float WAV file; None if unsupported"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                return None
+
+            fmt = None
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+                if chunk_id == b'fmt ':
+                    body = f.read(chunk_size + (chunk_size & 1))
+                    format_tag, channels, sr, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                        # The first two bytes of the sub-format GUID hold the real format tag
+                        format_tag = struct.unpack('<H', body[24:26])[0]
+                    fmt = (format_tag, channels, sr, block_align, bits)
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        return None
+                    data_offset = f.tell()
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), io.SEEK_CUR)
+    except OSError:
+        return None
+
+    format_tag, channels, sr, block_align, bits = fmt
+    if (format_tag, bits) not in _PCM_DTYPES or block_align != channels * bits // 8:
+        return None
+    dtype, scale = _PCM_DTYPES[(format_tag, bits)]
+
+    # Trust the file size over the header: recorders often leave data_size unset
+    n_frames = min(chunk_size, _file_size(path) - data_offset) // block_align
+    if n_frames <= 0:
+        return np.zeros(0, dtype=np.float32), sr
+
+    pcm = np.memmap(path, dtype=dtype, mode='r', offset=data_offset, shape=(n_frames, channels))
+    if scale is None:
+        audio = np.array(pcm, dtype=np.float32)
+    else:
+        audio = np.multiply(pcm, np.float32(scale), dtype=np.float32)
+    del pcm
+
+    return _to_mono(audio), sr
+
+
+def _file_size(path):
+    with open(path, 'rb') as f:
+        return f.seek(0, io.SEEK_END)
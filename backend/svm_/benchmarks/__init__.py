@@ -0,0 +1,21 @@
+'''
+Benchmarks for the audio pipeline hot paths, one module per area:
+
+    decoding     WAV decode latency and ingest throughput
+    features     streaming features, analysis rate and per-clip extraction latency
+    synthesis    per-clip simulators vs simulate_batch
+    cold_start   inference runtime start-up time and heavy imports
+    training     tuning modes, large-scale training and fit time
+    inference    sklearn vs compiled model latency
+    suite        all of the suite metrics as JSON, and comparison with a baseline
+
+    python -m svm_.benchmarks decode --files 20 --repeat 5
+    python -m svm_.benchmarks stream --window 5 --hop 0.5
+    python -m svm_.benchmarks coldstart --model models/ --max-seconds 1.5
+    python -m svm_.benchmarks tuning --data-dir dataset/equipment_sound_dataset
+    python -m svm_.benchmarks synth --clips 64
+    python -m svm_.benchmarks rate --rates 22050 44100 48000
+    python -m svm_.benchmarks largescale --features X.npy --labels y.npy --sizes 1000 4000 16000
+    python -m svm_.benchmarks suite --output benchmarks/current.json
+    python -m svm_.benchmarks compare benchmarks/baseline.json benchmarks/current.json --tolerance 0.2
+'''
@@ -0,0 +1,21 @@
+'''
+Command line for the benchmarks: each area module registers its subcommands.
+'''
+import argparse
+
+from svm_.benchmarks import cold_start, decoding, features, suite, synthesis, training
+
+AREAS = (decoding, features, synthesis, cold_start, training, suite)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m svm_.benchmarks', description="Audio pipeline benchmarks.")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    for area in AREAS:
+        area.add_arguments(subparsers)
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
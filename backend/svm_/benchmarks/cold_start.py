@@ -0,0 +1,76 @@
+'''
+Inference runtime cold start: start-up time and the modules it imports.
+'''
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+# Modules the inference runtime must not import: each costs from a few hundred
+# milliseconds to seconds of worker start-up
+HEAVY_MODULES = ('librosa', 'sklearn', 'scipy', 'numba', 'pandas', 'matplotlib')
+
+_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import svm_.runtime
+result = {'import_seconds': time.perf_counter() - start}
+if len(sys.argv) > 1:
+    runtime = svm_.runtime.InferenceRuntime.from_path(sys.argv[1])
+    runtime.warmup()
+    result['ready_seconds'] = time.perf_counter() - start
+result['modules'] = sorted(name for name in sys.modules if '.' not in name)
+print(json.dumps(result))
+"""
+
+
+def bench_cold_start(model_path=None, repeat=5, max_seconds=None, forbidden=HEAVY_MODULES):
+    """
+    Start `repeat` fresh interpreters that import svm_.runtime (and, with model_path,
+    load the model and classify one clip). Returns (passed, results): passed is False
+    if any forbidden module was imported or the median time exceeds max_seconds.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, '-c', _COLD_START_SCRIPT] + ([model_path] if model_path else [])
+
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    key = 'ready_seconds' if model_path else 'import_seconds'
+    results = {
+        'import_seconds': float(np.median([run['import_seconds'] for run in runs])),
+        'ready_seconds': float(np.median([run[key] for run in runs])),
+        'heavy_modules': sorted(set(runs[0]['modules']) & set(forbidden)),
+    }
+
+    print(f"Inference runtime cold start (median of {repeat} fresh interpreters):")
+    print(f"  import svm_.runtime       {1000 * results['import_seconds']:8.1f} ms")
+    if model_path:
+        print(f"  + load model and warm up  {1000 * results['ready_seconds']:8.1f} ms")
+    passed = True
+    if results['heavy_modules']:
+        print(f"  FAIL: heavy modules imported: {', '.join(results['heavy_modules'])}")
+        passed = False
+    if max_seconds is not None and results['ready_seconds'] > max_seconds:
+        print(f"  FAIL: {results['ready_seconds']:.3f} s exceeds the {max_seconds:.3f} s budget")
+        passed = False
+    return passed, results
+
+
+def add_arguments(subparsers):
+    coldstart = subparsers.add_parser('coldstart', help="Inference runtime start-up time; exits 1 on regression")
+    coldstart.add_argument('--model', help="Model file or directory to load and warm up as part of start-up")
+    coldstart.add_argument('--repeat', type=int, default=5)
+    coldstart.add_argument('--max-seconds', type=float, help="Fail if the median start-up time exceeds this")
+    coldstart.set_defaults(run=_run_cold_start)
+
+
+def _run_cold_start(args):
+    passed, _ = bench_cold_start(args.model, args.repeat, args.max_seconds)
+    if not passed:
+        sys.exit(1)
@@ -0,0 +1,38 @@
+'''
+Timing helpers and fixed-seed inputs shared by the benchmarks.
+'''
+import contextlib
+import io
+import time
+
+import numpy as np
+
+
+def time_call(fn, repeat=5):
+    """Median wall-clock time of fn() in seconds over `repeat` runs (after one warm-up)"""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def metric(value, unit, better='lower'):
+    """One suite metric"""
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+def quiet():
+    """Silence the progress prints of the code under test"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def suite_clip(duration, sr, seed=0, condition='early_fault'):
+    """One fixed-seed simulated clip, independent of any global random state"""
+    from svm_.dataset_simulation import SIMULATORS, sample_rng
+
+    class_index = list(SIMULATORS).index(condition)
+    audio, sr = SIMULATORS[condition](duration, sr, rng=sample_rng(seed, class_index, 0))
+    return audio.astype(np.float32), sr
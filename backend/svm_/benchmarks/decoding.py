@@ -0,0 +1,77 @@
+'''
+WAV decode latency and dataset ingest throughput.
+'''
+import os
+import random
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from svm_.benchmarks.common import metric, quiet, time_call
+
+
+def make_wav_files(directory, n_files=20, duration=3.0, sr=22050, seed=0):
+    """Write n_files fixed-seed simulated clips as 16-bit PCM WAVs, like generate_dataset does"""
+    from svm_.dataset_simulation import simulate_normal_sound
+
+    random.seed(seed)
+    np.random.seed(seed)
+    paths = []
+    for i in range(n_files):
+        audio, sr = simulate_normal_sound(duration, sr)
+        path = os.path.join(directory, f"bench_{i:03d}.wav")
+        sf.write(path, audio, sr)
+        paths.append(path)
+    return paths
+
+
+def bench_decode(paths, repeat=5):
+    """Compare librosa.load(sr=None) with svm_.audio_io.load_audio over the same files"""
+    import librosa
+    from svm_.audio_io import load_audio
+
+    candidates = {
+        'librosa.load': lambda path: librosa.load(path, sr=None),
+        'load_audio': load_audio,
+    }
+
+    results = {}
+    for name, decode in candidates.items():
+        seconds = time_call(lambda: [decode(path) for path in paths], repeat)
+        results[name] = 1000 * seconds / len(paths)
+
+    print(f"Decode latency per file ({len(paths)} files):")
+    for name, ms in results.items():
+        print(f"  {name:<14} {ms:8.3f} ms")
+    print(f"  speedup        {results['librosa.load'] / results['load_audio']:8.2f}x")
+    return results
+
+
+def ingest_metrics(directory, n_files, repeat=3):
+    """Suite metrics: files/s of each dataset loader over a generated dataset directory"""
+    from svm_.dataset_extraction import load_audio_files, load_features_parallel, load_features_streaming
+
+    metrics = {}
+    for name, ingest in (('load_audio_files', lambda: load_audio_files(directory)),
+                         ('load_features_streaming', lambda: load_features_streaming(directory)),
+                         ('load_features_parallel', lambda: load_features_parallel(directory))):
+        with quiet():
+            seconds = time_call(ingest, repeat)
+        metrics[f"ingest.{name}"] = metric(n_files / seconds, 'files/s', better='higher')
+    return metrics
+
+
+def add_arguments(subparsers):
+    decode = subparsers.add_parser('decode', help="WAV decode latency: librosa.load vs load_audio")
+    decode.add_argument('--files', type=int, default=20)
+    decode.add_argument('--duration', type=float, default=3.0)
+    decode.add_argument('--sr', type=int, default=22050)
+    decode.add_argument('--repeat', type=int, default=5)
+    decode.set_defaults(run=_run_decode)
+
+
+def _run_decode(args):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_wav_files(directory, args.files, args.duration, args.sr)
+        bench_decode(paths, args.repeat)
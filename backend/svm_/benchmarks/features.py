@@ -0,0 +1,98 @@
+'''
+Feature extraction: streaming vs full-window recompute, native capture rates
+vs the analysis rate, and per-clip extraction latency.
+'''
+import random
+import time
+
+import numpy as np
+
+from svm_.benchmarks.common import metric, suite_clip, time_call
+
+SUITE_EXTRACT_DURATIONS = (1.0, 5.0)
+SUITE_SAMPLE_RATES = (16000, 22050, 44100)
+
+
+def bench_stream(window=5.0, hop=0.5, sr=22050, hops=20, seed=0):
+    """Per-hop cost of StreamingFeatureExtractor vs recomputing the whole window,
+    and the largest difference between their feature vectors"""
+    from svm_.dataset_simulation import simulate_normal_sound
+    from svm_.feature_engine import clip_features
+    from svm_.streaming import StreamingFeatureExtractor
+
+    random.seed(seed)
+    np.random.seed(seed)
+    extractor = StreamingFeatureExtractor(sr, window, hop)
+    audio, sr = simulate_normal_sound((extractor.window_samples + hops * extractor.hop_samples) / sr + 1, sr)
+    audio = audio.astype(np.float32)
+
+    emitted = extractor.push(audio[:extractor.window_samples])
+    start = time.perf_counter()
+    for i in range(hops):
+        offset = extractor.window_samples + i * extractor.hop_samples
+        emitted += extractor.push(audio[offset:offset + extractor.hop_samples])
+    incremental = (time.perf_counter() - start) / hops
+
+    end = extractor.samples_seen
+    window_audio = audio[end - extractor.window_samples:end]
+    full = time_call(lambda: clip_features(window_audio, sr), repeat=3)
+    error = np.max(np.abs(emitted[-1][1] - clip_features(window_audio, sr)) / (np.abs(emitted[-1][1]) + 1e-12))
+
+    print(f"Streaming features ({window:g} s window, {hop:g} s hop):")
+    print(f"  per hop        {1000 * incremental:8.3f} ms")
+    print(f"  full window    {1000 * full:8.3f} ms")
+    print(f"  max rel. diff  {error:8.2e}")
+    return {'per_hop_ms': 1000 * incremental, 'full_window_ms': 1000 * full, 'max_relative_difference': error}
+
+
+def bench_analysis_rate(rates=(22050, 44100, 48000), duration=5.0, repeat=10, seed=0):
+    """Per-clip feature extraction at each capture rate's native rate vs resampling
+    to the analysis rate first (what load_clip does)"""
+    from svm_.dataset_simulation import simulate_normal_sound
+    from svm_.feature_engine import ANALYSIS_SR
+    from svm_.feature_extraction import extract_features, to_analysis_rate
+
+    results = {}
+    print(f"Feature extraction for one {duration:g} s clip, analysis rate {ANALYSIS_SR} Hz:")
+    for sr in rates:
+        np.random.seed(seed)
+        audio = simulate_normal_sound(duration, sr)[0].astype(np.float32)
+        native = time_call(lambda: extract_features([(audio, sr)]), repeat)
+        resample = time_call(lambda: to_analysis_rate(audio, sr), repeat)
+        canonical = time_call(lambda: extract_features([to_analysis_rate(audio, sr)]), repeat)
+        results[sr] = {'native_seconds': native, 'resample_seconds': resample, 'canonical_seconds': canonical}
+        print(f"  {sr:>6} Hz  native {1000 * native:7.2f} ms   resample + extract {1000 * canonical:7.2f} ms"
+              f"   (resample {1000 * resample:.2f} ms, {native / canonical:.2f}x)")
+    return results
+
+
+def extraction_metrics(quick=False, repeat=5, seed=0):
+    """Suite metrics: per-clip extraction latency by clip length and sample rate, single and batched"""
+    from svm_.feature_extraction import extract_features, extract_features_batch
+
+    metrics = {}
+    sample_rates = (22050,) if quick else SUITE_SAMPLE_RATES
+    for duration in SUITE_EXTRACT_DURATIONS:
+        for sr in sample_rates:
+            clip = suite_clip(duration, sr, seed)
+            seconds = time_call(lambda: extract_features([clip]), repeat)
+            metrics[f"extract.single.{duration:g}s_{sr}hz"] = metric(1000 * seconds, 'ms')
+    clips = [suite_clip(3.0, 22050, seed + i) for i in range(16)]
+    seconds = time_call(lambda: extract_features_batch(clips), repeat)
+    metrics["extract.batch16.3s_22050hz"] = metric(1000 * seconds / len(clips), 'ms/clip')
+    return metrics
+
+
+def add_arguments(subparsers):
+    stream = subparsers.add_parser('stream', help="Incremental streaming features vs full-window recompute")
+    stream.add_argument('--window', type=float, default=5.0)
+    stream.add_argument('--hop', type=float, default=0.5)
+    stream.add_argument('--sr', type=int, default=22050)
+    stream.add_argument('--hops', type=int, default=20)
+    stream.set_defaults(run=lambda args: bench_stream(args.window, args.hop, args.sr, args.hops))
+
+    rate = subparsers.add_parser('rate', help="Extraction at native capture rates vs the analysis rate")
+    rate.add_argument('--rates', type=int, nargs='+', default=[22050, 44100, 48000])
+    rate.add_argument('--duration', type=float, default=5.0)
+    rate.add_argument('--repeat', type=int, default=10)
+    rate.set_defaults(run=lambda args: bench_analysis_rate(args.rates, args.duration, args.repeat))
@@ -0,0 +1,27 @@
+'''
+Inference latency: the sklearn pipeline vs the compiled model, single clip and batched.
+'''
+import numpy as np
+
+from svm_.benchmarks.common import metric, quiet, time_call
+
+
+def inference_metrics(model, X, audio_file, repeat=5):
+    """Suite metrics: predict_features latency of `model` and its compiled form for
+    one row and a batch of 64, and end-to-end classify_audio on audio_file"""
+    from svm_.classification import classify_audio, predict_features
+    from svm_.compiled_model import compile_pipeline
+    from svm_.runtime import CLASS_NAMES
+
+    metrics = {}
+    compiled = compile_pipeline(model)
+    for name, candidate in (('sklearn', model), ('compiled', compiled)):
+        seconds = time_call(lambda: predict_features(candidate, X[:1], CLASS_NAMES), 10 * repeat)
+        metrics[f"infer.{name}.single"] = metric(1000 * seconds, 'ms')
+        batch = np.resize(X, (64, X.shape[1]))
+        seconds = time_call(lambda: predict_features(candidate, batch, CLASS_NAMES), 10 * repeat)
+        metrics[f"infer.{name}.batch64"] = metric(1000 * seconds / len(batch), 'ms/clip')
+    with quiet():
+        seconds = time_call(lambda: classify_audio(compiled, audio_file, CLASS_NAMES), repeat)
+    metrics["infer.classify_audio"] = metric(1000 * seconds, 'ms')
+    return metrics
@@ -0,0 +1,132 @@
+'''
+The benchmark suite: every area's suite metrics on fixed-seed simulated data,
+written to JSON, and the comparison of two result files.
+'''
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from svm_.benchmarks.common import quiet
+from svm_.benchmarks.decoding import ingest_metrics
+from svm_.benchmarks.features import extraction_metrics
+from svm_.benchmarks.inference import inference_metrics
+from svm_.benchmarks.training import SUITE_FIT_SIZES, fit_metrics
+
+
+def run_suite(quick=False, repeat=5, seed=0):
+    """
+    Measure feature extraction latency per clip length and sample rate, ingest
+    throughput, build_svm_model fit time by dataset size and single/batched
+    inference latency on fixed-seed simulated data. quick=True runs a smaller
+    subset for CI. Returns {'meta': ..., 'metrics': {name: {'value', 'unit', 'better'}}}.
+    """
+    from svm_.dataset_simulation import generate_dataset_parallel, synthetic_features
+    from svm_.feature_extraction import feature_fingerprint
+
+    repeat = 2 if quick else repeat
+    metrics = extraction_metrics(quick, repeat, seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        per_class = 4 if quick else 10
+        with quiet():
+            generate_dataset_parallel(directory, per_class, 22050, seed=seed, n_jobs=1)
+        metrics.update(ingest_metrics(directory, 3 * per_class, repeat=1 if quick else 3))
+
+        sizes = SUITE_FIT_SIZES[:2] if quick else SUITE_FIT_SIZES
+        X, y = synthetic_features(max(sizes), seed=seed)
+        fit, model = fit_metrics(X, y, sizes)
+        metrics.update(fit)
+        metrics.update(inference_metrics(model, X, os.path.join(directory, 'failure', 'failure_001.wav'), repeat))
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import sklearn
+    meta = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'quick': quick,
+        'seed': seed,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'feature_fingerprint': feature_fingerprint(),
+    }
+    return {'meta': meta, 'metrics': metrics}
+
+
+def compare_results(baseline, current, tolerance=0.2):
+    """
+    Print each metric's change against the baseline. A metric regresses when it
+    is worse by more than `tolerance` (a fraction), or is missing from the current
+    results. Returns the regressed names.
+    """
+    regressions = []
+    print(f"{'metric':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, old in baseline['metrics'].items():
+        new = current['metrics'].get(name)
+        if new is None:
+            print(f"{name:<36} {old['value']:12.4g} {'missing':>12} {'':>8}  {old['unit']} REGRESSION")
+            regressions.append(name)
+            continue
+        change = new['value'] / old['value'] - 1 if old['value'] else 0.0
+        worse = change if old['better'] == 'lower' else -change
+        flag = ''
+        if worse > tolerance:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif worse < -tolerance:
+            flag = 'improved'
+        print(f"{name:<36} {old['value']:12.4g} {new['value']:12.4g} {100 * change:+7.1f}%  {old['unit']} {flag}")
+    for name in current['metrics'].keys() - baseline['metrics'].keys():
+        print(f"{name:<36} {'new':>12} {current['metrics'][name]['value']:12.4g}")
+
+    if baseline['meta'].get('platform') != current['meta'].get('platform'):
+        print("Warning: results come from different platforms")
+    missing = len(baseline['metrics'].keys() - current['metrics'].keys())
+    print(f"{len(regressions)} regression(s): {len(regressions) - missing} beyond {100 * tolerance:.0f}%, "
+          f"{missing} missing")
+    return regressions
+
+
+def add_arguments(subparsers):
+    suite = subparsers.add_parser('suite', help="Extraction, ingest, fit and inference metrics, written to JSON")
+    suite.add_argument('--output', default='benchmark_results.json')
+    suite.add_argument('--quick', action='store_true', help="Smaller subset, e.g. for CI")
+    suite.add_argument('--repeat', type=int, default=5)
+    suite.set_defaults(run=_run_suite)
+
+    compare = subparsers.add_parser('compare', help="Compare suite results with a baseline; exits 1 on regression")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown as a fraction")
+    compare.set_defaults(run=_run_compare)
+
+
+def _run_suite(args):
+    results = run_suite(args.quick, args.repeat)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    for name, metric in results['metrics'].items():
+        print(f"  {name:<36} {metric['value']:12.4g} {metric['unit']}")
+    print(f"Results saved to {args.output}")
+
+
+def _run_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if compare_results(baseline, current, args.tolerance):
+        sys.exit(1)
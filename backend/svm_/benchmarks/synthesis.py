@@ -0,0 +1,34 @@
+'''
+Dataset synthesis: per-clip simulators vs the vectorised simulate_batch.
+'''
+import numpy as np
+
+from svm_.benchmarks.common import time_call
+
+
+def bench_synthesis(n_clips=64, duration=3.0, sr=22050, seed=0):
+    """Clips per second of the per-clip simulators (plus environmental noise)
+    vs simulate_batch, for each class"""
+    from svm_.dataset_simulation import SIMULATORS, add_environmental_noise, simulate_batch
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    print(f"Synthesis of {n_clips} x {duration:g} s clips:")
+    for condition, simulate in SIMULATORS.items():
+        per_clip = time_call(lambda: [
+            add_environmental_noise(simulate(duration, sr, rng=rng)[0], rng.uniform(0.01, 0.05), rng=rng)
+            for _ in range(n_clips)
+        ], repeat=3)
+        batch = time_call(lambda: simulate_batch(condition, n_clips, duration, sr, rng=rng), repeat=3)
+        results[condition] = {'per_clip_seconds': per_clip, 'batch_seconds': batch}
+        print(f"  {condition:<12} per clip {n_clips / per_clip:8.1f} clips/s   batch {n_clips / batch:8.1f} clips/s"
+              f"   ({per_clip / batch:.2f}x)")
+    return results
+
+
+def add_arguments(subparsers):
+    synth = subparsers.add_parser('synth', help="Per-clip simulators vs vectorised simulate_batch")
+    synth.add_argument('--clips', type=int, default=64)
+    synth.add_argument('--duration', type=float, default=3.0)
+    synth.add_argument('--sr', type=int, default=22050)
+    synth.set_defaults(run=lambda args: bench_synthesis(args.clips, args.duration, args.sr))
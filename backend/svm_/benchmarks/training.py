@@ -0,0 +1,124 @@
+'''
+Training: the tuning modes, exact SVC vs the large-scale trainer, and fit time.
+'''
+import time
+
+import numpy as np
+
+from svm_.benchmarks.common import metric, quiet
+
+SUITE_FIT_SIZES = (20, 40, 80)  # clips per class
+
+
+def bench_tuning(features, labels, test_size=0.25, seed=42):
+    """Wall-clock and held-out quality of the exhaustive grid search vs the fast
+    (successive halving, calibrate-the-winner) and precomputed-kernel tuning modes"""
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.model_selection import train_test_split
+    from svm_.svm_model import build_svm_model
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, labels, test_size=test_size, random_state=seed, stratify=labels
+    )
+
+    results = {}
+    for name in ('grid', 'fast', 'precomputed'):
+        start = time.perf_counter()
+        model = build_svm_model(X_train, y_train, tuning=name)
+        seconds = time.perf_counter() - start
+        predictions = model.predict(X_test)
+        svm = model.named_steps['svm']
+        results[name] = {
+            'seconds': seconds,
+            'params': {'C': svm.C, 'gamma': svm.gamma, 'kernel': svm.kernel},
+            'f1_weighted': float(f1_score(y_test, predictions, average='weighted')),
+            'accuracy': float(accuracy_score(y_test, predictions)),
+        }
+
+    print(f"SVM tuning ({len(X_train)} training, {len(X_test)} held-out samples):")
+    for name, result in results.items():
+        speedup = results['grid']['seconds'] / result['seconds']
+        print(f"  {name:<11} {result['seconds']:8.2f} s ({speedup:5.2f}x)   f1 {result['f1_weighted']:.4f}   "
+              f"accuracy {result['accuracy']:.4f}   {result['params']}")
+    return results
+
+
+def bench_large_scale(features, labels, sizes=(1000, 2000, 4000, 8000), test_size=0.25, jitter=0.1, seed=42):
+    """
+    Training time and held-out accuracy of the exact SVC (the selected
+    configuration, no search) vs the large-scale Nystroem + SGD trainer as the
+    training set grows. Larger training sets are resampled from the training
+    split with Gaussian jitter of `jitter` feature standard deviations.
+    """
+    from sklearn.model_selection import train_test_split
+    from svm_.large_scale import array_chunks, train_large_scale
+    from svm_.svm_model import make_pipeline
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, labels, test_size=test_size, random_state=seed, stratify=labels
+    )
+    rng = np.random.default_rng(seed)
+    scale = jitter * X_train.std(axis=0)
+
+    results = []
+    print(f"Large-scale training ({len(X_test)} held-out samples):")
+    print(f"  {'samples':>8}  {'exact SVC':>18}  {'Nystroem + SGD':>18}")
+    for size in sizes:
+        index = rng.integers(len(X_train), size=size)
+        X = X_train[index] + rng.standard_normal((size, X_train.shape[1])) * scale
+        y = y_train[index]
+
+        row = {'samples': size}
+        for name, train in (('exact', lambda: make_pipeline(probability=True).fit(X, y)),
+                            ('large_scale', lambda: train_large_scale(array_chunks(X, y)))):
+            start = time.perf_counter()
+            model = train()
+            row[name] = {'seconds': time.perf_counter() - start,
+                         'accuracy': float(np.mean(model.predict(X_test) == y_test))}
+        results.append(row)
+        print(f"  {size:>8}  {row['exact']['seconds']:7.2f} s  acc {row['exact']['accuracy']:.3f}"
+              f"  {row['large_scale']['seconds']:7.2f} s  acc {row['large_scale']['accuracy']:.3f}")
+    return results
+
+
+def fit_metrics(X, y, sizes=SUITE_FIT_SIZES):
+    """Suite metrics: build_svm_model (exhaustive grid search) fit time by clips per
+    class. Returns (metrics, the model fitted on the largest size)"""
+    from svm_.svm_model import build_svm_model
+
+    metrics = {}
+    for size in sizes:
+        index = np.concatenate([np.flatnonzero(y == label)[:size] for label in np.unique(y)])
+        with quiet():
+            start = time.perf_counter()
+            model = build_svm_model(X[index], y[index])
+            metrics[f"fit.grid.{3 * size}"] = metric(time.perf_counter() - start, 's')
+    return metrics, model
+
+
+def add_arguments(subparsers):
+    tuning = subparsers.add_parser('tuning', help="Exhaustive grid search vs the fast and precomputed tuning modes")
+    _add_dataset_arguments(tuning)
+    tuning.set_defaults(run=lambda args: bench_tuning(*_load_dataset(tuning, args)))
+
+    largescale = subparsers.add_parser('largescale', help="Exact SVC vs large-scale trainer as the dataset grows")
+    _add_dataset_arguments(largescale)
+    largescale.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 4000, 8000])
+    largescale.add_argument('--jitter', type=float, default=0.1, help="Resampling noise, in feature standard deviations")
+    largescale.set_defaults(run=lambda args: bench_large_scale(*_load_dataset(largescale, args), args.sizes,
+                                                               jitter=args.jitter))
+
+
+def _add_dataset_arguments(parser):
+    parser.add_argument('--data-dir', help="Dataset directory with one sub-directory per class")
+    parser.add_argument('--features', help=".npy feature matrix (instead of --data-dir)")
+    parser.add_argument('--labels', help=".npy label vector to go with --features")
+
+
+def _load_dataset(parser, args):
+    if args.features:
+        return np.load(args.features), np.load(args.labels)
+    if args.data_dir:
+        from svm_.dataset_extraction import load_features_parallel
+        return load_features_parallel(args.data_dir)
+    parser.error("needs --data-dir or --features and --labels")
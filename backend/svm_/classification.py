@@ -1,48 +1,141 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.pipeline import Pipeline
-from sklearn.decomposition import PCA
 import os
 import warnings
 warnings.filterwarnings('ignore')
 
-from svm_.feature_extraction import extract_features
+from svm_.instrumentation import stage
+from svm_.feature_extraction import (
+    extract_features, extract_features_batch, load_clip, model_families, to_analysis_rate,
+)
 
 # 7. Function to classify new audio
 def classify_audio(model, audio_file, class_names):
     """Classify a single audio file using the trained model"""
+    # Load audio at the analysis rate
+    audio, sr = load_clip(audio_file)
+    
+    return classify_waveform(model, audio, sr, class_names, os.path.basename(audio_file))
+
+
+def classify_waveform(model, audio, sr, class_names, name="audio"):
+    """Classify an already decoded waveform using the trained model"""
     try:
-        # Load audio
-        audio, sr = librosa.load(audio_file, sr=None)
-        
         # Extract features (same as in training)
-        audio_data = [(audio, sr)]
-        features = extract_features(audio_data)
+        audio_data = [to_analysis_rate(audio, sr)]
+        features = extract_features(audio_data, families=model_families(model))
         print(features.shape)
         
         # Make prediction
-        prediction = model.predict(features)[0]
-        probabilities = model.predict_proba(features)[0]
-
-        result = {
-            'predicted_class': class_names[prediction],
-            'probabilities': probabilities
-        }
+        result = predict_features(model, features, class_names)[0]
+        probabilities = result['probabilities']
         
         # Print results
-        print(f"\nClassification for {os.path.basename(audio_file)}:")
-        print(f"Predicted class: {class_names[prediction]}")
+        print(f"\nClassification for {name}:")
+        print(f"Predicted class: {result['predicted_class']}")
         print("Class probabilities:")
         for i, class_name in enumerate(class_names):
             print(f"  {class_name}: {probabilities[i]:.4f}")
         
     except Exception as e:
         print(f"Error classifying audio: {e}")
-    return result
\ No newline at end of file
+    return result
+
+
+def predict_features(model, features, class_names):
+    """Classify a 2-D array of feature vectors with one batched model call.
+    Returns one {'predicted_class', 'probabilities'} dict per row."""
+    if hasattr(model, 'predict_with_proba'):
+        # CompiledSVM: labels and probabilities from one pass
+        predictions, probabilities = model.predict_with_proba(features)
+    else:
+        with stage('model'):
+            predictions = model.predict(features)
+            probabilities = model.predict_proba(features)
+    
+    return [
+        {'predicted_class': class_names[prediction], 'probabilities': row_probabilities}
+        for prediction, row_probabilities in zip(predictions, probabilities)
+    ]
+
+# 8. Classify many clips at once
+def classify_batch(model, sources, class_names, chunk_size=32, cache=None):
+    """
+    Classify many clips with batched feature extraction and one model call per chunk.
+    sources may mix file paths, raw file bytes and (audio, sr) tuples.
+    Returns one dict per source, in order: {'index', 'source', 'predicted_class', 'probabilities'},
+    or {'index', 'source', 'error'} if that clip could not be decoded or featurised.
+    """
+    results = []
+    for chunk_results in iter_classify_batch(model, sources, class_names, chunk_size, cache):
+        results.extend(chunk_results)
+    return results
+
+
+def iter_classify_batch(model, sources, class_names, chunk_size=32, cache=None):
+    """Generator form of classify_batch: yields each chunk's results as soon as they are ready"""
+    families = model_families(model)
+    chunk = []
+    for index, source in enumerate(sources):
+        chunk.append((index, source))
+        if len(chunk) >= chunk_size:
+            yield classify_features(model, chunk, featurise_sources([s for _, s in chunk], cache, families),
+                                    class_names)
+            chunk = []
+    
+    if chunk:
+        yield classify_features(model, chunk, featurise_sources([s for _, s in chunk], cache, families),
+                                class_names)
+
+
+def featurise_sources(sources, cache=None, families=None):
+    """
+    Decode and featurise a list of sources (paths, bytes or (audio, sr) tuples) as one batch,
+    computing only the given feature families (None: all).
+    Returns one (feature_vector or None, error message or None) pair per source.
+    """
+    results = [None] * len(sources)
+    audio_data, decoded = [], []
+    
+    for i, source in enumerate(sources):
+        try:
+            audio_data.append(to_analysis_rate(*source) if isinstance(source, tuple) else load_clip(source))
+            decoded.append(i)
+        except Exception as e:
+            results[i] = (None, f"Error loading audio: {e}")
+    
+    try:
+        features = extract_features_batch(audio_data, cache=cache, families=families)
+        for i, row in zip(decoded, features):
+            results[i] = (row, None)
+    except Exception:
+        # Retry one clip at a time so a single bad clip doesn't fail the batch
+        for i, clip in zip(decoded, audio_data):
+            try:
+                results[i] = (extract_features_batch([clip], cache=cache, families=families)[0], None)
+            except Exception as e:
+                results[i] = (None, f"Error extracting features: {e}")
+    
+    return results
+
+
+def classify_features(model, indexed_sources, featurised, class_names):
+    """Classify the rows featurise_sources produced with one model call.
+    indexed_sources holds the matching (index, source or display name) pairs."""
+    results = []
+    ok = []
+    for (index, source), (row, error) in zip(indexed_sources, featurised):
+        results.append({'index': index, 'source': _source_name(source, index)})
+        if error is None:
+            ok.append((results[-1], row))
+        else:
+            results[-1]['error'] = error
+    
+    if ok:
+        predictions = predict_features(model, np.array([row for _, row in ok]), class_names)
+        for (result, _), prediction in zip(ok, predictions):
+            result.update(prediction)
+    return results
+
+
+def _source_name(source, index):
+    return source if isinstance(source, str) else f"clip_{index}"
@@ -0,0 +1,420 @@
+'''
+Compiled inference for the trained scaler -> PCA -> SVC pipeline, and for the
+large-scale scaler -> kernel approximation -> SGD model (svm_.large_scale).
+
+    python -m svm_.compiled_model models/svm_model.joblib models/svm_model_compiled.joblib
+'''
+import argparse
+
+import numpy as np
+
+from svm_.instrumentation import stage
+
+# libsvm clips pairwise probabilities to [MIN_PROB, 1 - MIN_PROB]
+MIN_PROB = 1e-7
+
+# Batches up to this size use the scalar pairwise-coupling loop
+SCALAR_COUPLING_MAX_ROWS = 8
+
+
+class CompiledSVM:
+    """
+    Pure-NumPy equivalent of a fitted Pipeline([StandardScaler, PCA, SVC(probability=True)]).
+
+    StandardScaler and PCA are folded into one affine map, the kernel against all
+    support vectors is evaluated with one matrix product, and both the one-vs-one
+    vote (what SVC.predict returns) and libsvm's Platt-scaled, pairwise-coupled
+    probabilities (what SVC.predict_proba returns) come out of the same pass.
+    feature_families names the feature families the pipeline was trained on (None: all).
+    """
+
+    MODEL_TYPE = 'svc'
+    # Attributes a model artifact stores as arrays, and as header parameters
+    ARRAYS = ('weight', 'bias', 'support_vectors', 'pair_coef', 'intercept', 'prob_a', 'prob_b')
+    PARAMS = ('kernel', 'gamma', 'coef0', 'degree')
+
+    def __init__(self, weight, bias, support_vectors, pair_coef, intercept, prob_a, prob_b,
+                 classes, kernel, gamma, coef0, degree, feature_families=None):
+        self.weight = weight
+        self.bias = bias
+        self.support_vectors = support_vectors
+        self.pair_coef = pair_coef
+        self.intercept = intercept
+        self.prob_a = prob_a
+        self.prob_b = prob_b
+        self.classes_ = classes
+        self.kernel = kernel
+        self.gamma = gamma
+        self.coef0 = coef0
+        self.degree = degree
+        self.feature_families = feature_families
+
+        n_classes = len(classes)
+        self.pairs = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)]
+        self.sv_sq_norms = np.einsum('ij,ij->i', support_vectors, support_vectors)
+
+        # Pair -> class incidence, used to count one-vs-one votes with two matrix products
+        self._first_class = np.zeros((len(self.pairs), n_classes), dtype=np.int64)
+        self._second_class = np.zeros((len(self.pairs), n_classes), dtype=np.int64)
+        for p, (i, j) in enumerate(self.pairs):
+            self._first_class[p, i] = 1
+            self._second_class[p, j] = 1
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Build from a fitted scaler -> PCA -> SVC pipeline (e.g. GridSearchCV.best_estimator_)"""
+        scaler = pipeline.named_steps['scaler']
+        pca = pipeline.named_steps['pca']
+        svc = pipeline.named_steps['svm']
+        if not svc.probability:
+            raise ValueError("The SVC must be trained with probability=True")
+
+        # x -> ((x - mean) / scale - pca.mean_) @ components.T, as x @ weight + bias
+        mean = scaler.mean_ if scaler.mean_ is not None else 0.0
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(pca.n_features_in_)
+        components = pca.components_
+        if pca.whiten:
+            components = components / np.sqrt(pca.explained_variance_)[:, np.newaxis]
+        weight = components.T / scale[:, np.newaxis]
+        bias = -(mean / scale + pca.mean_) @ components.T
+
+        # Spread libsvm's (n_classes - 1, n_SV) dual coefficients into one column per class pair:
+        # the (i, j) decision uses coef[j - 1] for class i's SVs and coef[i] for class j's SVs
+        n_classes = len(svc.classes_)
+        starts = np.concatenate([[0], np.cumsum(svc.n_support_)])
+        pairs = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)]
+        pair_coef = np.zeros((len(svc.support_vectors_), len(pairs)))
+        for p, (i, j) in enumerate(pairs):
+            pair_coef[starts[i]:starts[i + 1], p] = svc._dual_coef_[j - 1, starts[i]:starts[i + 1]]
+            pair_coef[starts[j]:starts[j + 1], p] = svc._dual_coef_[i, starts[j]:starts[j + 1]]
+
+        return cls(
+            weight=weight,
+            bias=bias,
+            support_vectors=np.asarray(svc.support_vectors_, dtype=np.float64),
+            pair_coef=pair_coef,
+            intercept=np.asarray(svc._intercept_, dtype=np.float64),
+            prob_a=np.asarray(svc.probA_, dtype=np.float64),
+            prob_b=np.asarray(svc.probB_, dtype=np.float64),
+            classes=svc.classes_,
+            kernel=svc.kernel,
+            gamma=float(svc._gamma),
+            coef0=float(svc.coef0),
+            degree=int(svc.degree),
+            feature_families=getattr(pipeline, 'feature_families', None),
+        )
+
+    # Inference
+    def transform(self, X):
+        """Scaler + PCA as one affine map"""
+        return np.asarray(X, dtype=np.float64) @ self.weight + self.bias
+
+    def kernel_matrix(self, Z):
+        dot = Z @ self.support_vectors.T
+        if self.kernel == 'rbf':
+            sq_dist = np.einsum('ij,ij->i', Z, Z)[:, np.newaxis] + self.sv_sq_norms - 2 * dot
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0))
+        if self.kernel == 'poly':
+            return (self.gamma * dot + self.coef0) ** self.degree
+        if self.kernel == 'sigmoid':
+            return np.tanh(self.gamma * dot + self.coef0)
+        if self.kernel == 'linear':
+            return dot
+        raise ValueError(f"Unsupported kernel: {self.kernel!r}")
+
+    def decision_values(self, X):
+        """libsvm one-vs-one decision values, shape (n_samples, n_pairs)"""
+        with stage('model.scaler_pca'):
+            Z = self.transform(X)
+        with stage('model.svc'):
+            return self.kernel_matrix(Z) @ self.pair_coef + self.intercept
+
+    def predict_with_proba(self, X):
+        """Predicted labels and class probabilities from a single pass"""
+        decision = self.decision_values(X)
+
+        # One-vs-one voting; ties go to the lower class index, as in libsvm
+        first_wins = decision > 0
+        votes = first_wins @ self._first_class + ~first_wins @ self._second_class
+        labels = self.classes_[np.argmax(votes, axis=1)]
+
+        with stage('model.probability'):
+            probabilities = self._probabilities(decision)
+        return labels, probabilities
+
+    def _probabilities(self, decision):
+        n_samples, n_classes = decision.shape[0], len(self.classes_)
+
+        # Platt-scaled pairwise probabilities r[i, j] = P(i | i or j)
+        f = decision * self.prob_a + self.prob_b
+        e = np.exp(-np.abs(f))
+        pairwise = np.where(f >= 0, e / (1 + e), 1 / (1 + e))
+        pairwise = np.clip(pairwise, MIN_PROB, 1 - MIN_PROB)
+        r = np.zeros((n_samples, n_classes, n_classes))
+        for p, (i, j) in enumerate(self.pairs):
+            r[:, i, j] = pairwise[:, p]
+            r[:, j, i] = 1 - pairwise[:, p]
+
+        # sklearn's libsvm couples iteratively even for two classes, so do the same.
+        # For a handful of rows plain Python floats beat NumPy's per-call overhead.
+        if n_samples <= SCALAR_COUPLING_MAX_ROWS:
+            return np.array([_multiclass_probability_one(rows) for rows in r.tolist()])
+        return _multiclass_probability(r)
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+    def predict_proba(self, X):
+        return self.predict_with_proba(X)[1]
+
+
+def _multiclass_probability_one(r):
+    """libsvm's multiclass_probability for one sample, r given as nested lists"""
+    k = len(r)
+    max_iter = max(100, k)
+    eps = 0.005 / k
+
+    Q = [[0.0] * k for _ in range(k)]
+    for t in range(k):
+        for j in range(k):
+            if j != t:
+                Q[t][t] += r[j][t] * r[j][t]
+                Q[t][j] = -r[j][t] * r[t][j]
+
+    p = [1.0 / k] * k
+    Qp = [0.0] * k
+    for _ in range(max_iter):
+        pQp = 0.0
+        for t in range(k):
+            Qp[t] = sum(Q[t][j] * p[j] for j in range(k))
+            pQp += p[t] * Qp[t]
+        if max(abs(Qp[t] - pQp) for t in range(k)) < eps:
+            break
+
+        for t in range(k):
+            diff = (-Qp[t] + pQp) / Q[t][t]
+            p[t] += diff
+            pQp = (pQp + diff * (diff * Q[t][t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            for j in range(k):
+                Qp[j] = (Qp[j] + diff * Q[t][j]) / (1 + diff)
+                p[j] /= (1 + diff)
+    return p
+
+
+def _multiclass_probability(r):
+    """libsvm's pairwise coupling (Wu, Lin and Weng 2004, method 2), vectorised over samples"""
+    n_samples, k, _ = r.shape
+    max_iter = max(100, k)
+    eps = 0.005 / k
+
+    # Q[t, t] = sum_{j != t} r[j, t]^2 ; Q[t, j] = -r[j, t] * r[t, j]
+    rt = r.transpose(0, 2, 1)
+    Q = -rt * r
+    diagonal = np.sum(rt ** 2, axis=2) - np.einsum('nii->ni', rt) ** 2
+    Q[:, np.arange(k), np.arange(k)] = diagonal
+
+    p = np.full((n_samples, k), 1.0 / k)
+    # Iterate on the samples that have not converged yet; finished rows are written back to p
+    remaining = np.arange(n_samples)
+    Qr, pr = Q, p.copy()
+    for _ in range(max_iter):
+        Qp = np.einsum('ntj,nj->nt', Qr, pr)
+        pQp = np.sum(pr * Qp, axis=1)
+        converged = np.max(np.abs(Qp - pQp[:, np.newaxis]), axis=1) < eps
+        if converged.any():
+            p[remaining[converged]] = pr[converged]
+            keep = ~converged
+            remaining, Qr, pr, Qp, pQp = remaining[keep], Qr[keep], pr[keep], Qp[keep], pQp[keep]
+            if len(remaining) == 0:
+                break
+
+        # Gauss-Seidel sweep over the classes
+        for t in range(k):
+            diff = (-Qp[:, t] + pQp) / Qr[:, t, t]
+            pr[:, t] += diff
+            pQp = (pQp + diff * (diff * Qr[:, t, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, np.newaxis] * Qr[:, t, :]) / (1 + diff)[:, np.newaxis]
+            pr /= (1 + diff)[:, np.newaxis]
+    else:
+        p[remaining] = pr
+    return p
+
+
+class CompiledKernelApproximation:
+    """
+    Pure-NumPy equivalent of a model from svm_.large_scale.train_large_scale:
+    Pipeline([StandardScaler, Nystroem or RBFSampler, SGDClassifier(log_loss)]),
+    optionally wrapped in a sigmoid CalibratedClassifierCV around the frozen pipeline.
+
+    The scaler is an affine map (weight is diagonal). kernel='nystroem' maps z to
+    rbf(z, landmarks) @ map_weight; kernel='rff' to cos(z @ map_weight + map_bias)
+    scaled by sqrt(2 / n_components). The SGD scores are map @ coef + intercept.
+    With calibration, every fold's sigmoids (calibration_a/b, one row per fold)
+    turn the scores into normalised probabilities that are averaged over the folds,
+    and the label is the most probable class; without, the probabilities and
+    labels are SGDClassifier's own.
+    """
+
+    MODEL_TYPE = 'kernel_approximation'
+    ARRAYS = ('weight', 'bias', 'landmarks', 'map_weight', 'map_bias', 'coef', 'intercept',
+              'calibration_a', 'calibration_b')
+    PARAMS = ('kernel', 'gamma')
+
+    def __init__(self, weight, bias, landmarks, map_weight, map_bias, coef, intercept, calibration_a, calibration_b,
+                 classes, kernel, gamma, feature_families=None):
+        self.weight = weight
+        self.bias = bias
+        self.landmarks = landmarks
+        self.map_weight = map_weight
+        self.map_bias = map_bias
+        self.coef = coef
+        self.intercept = intercept
+        self.calibration_a = calibration_a
+        self.calibration_b = calibration_b
+        self.classes_ = classes
+        self.kernel = kernel
+        self.gamma = gamma
+        self.feature_families = feature_families
+        self.landmark_sq_norms = np.einsum('ij,ij->i', landmarks, landmarks)
+
+    @classmethod
+    def from_model(cls, model):
+        """Build from a fitted large-scale pipeline, or its sigmoid CalibratedClassifierCV"""
+        calibrators = []
+        pipeline = model
+        if hasattr(model, 'calibrated_classifiers_'):
+            if model.method != 'sigmoid':
+                raise ValueError("Only sigmoid calibration can be compiled")
+            for calibrated in model.calibrated_classifiers_:
+                calibrators.append([(c.a_, c.b_) for c in calibrated.calibrators])
+            pipeline = model.calibrated_classifiers_[0].estimator
+            pipeline = getattr(pipeline, 'estimator', pipeline)  # FrozenEstimator
+
+        scaler = pipeline.named_steps['scaler']
+        kernel_map = pipeline.named_steps['kernel']
+        sgd = pipeline.named_steps['sgd']
+
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(scaler.n_features_in_)
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(scaler.n_features_in_)
+        if hasattr(kernel_map, 'normalization_'):
+            if kernel_map.kernel != 'rbf':
+                raise ValueError(f"Unsupported Nystroem kernel: {kernel_map.kernel!r}")
+            kernel, gamma = 'nystroem', kernel_map.gamma
+            landmarks, map_weight = kernel_map.components_, kernel_map.normalization_.T
+            map_bias = np.zeros(map_weight.shape[1])
+        else:
+            kernel, gamma = 'rff', kernel_map.gamma
+            landmarks = np.zeros((0, scaler.n_features_in_))
+            map_weight, map_bias = kernel_map.random_weights_, kernel_map.random_offset_
+
+        n_scores = sgd.coef_.shape[0]
+        calibration = np.array(calibrators, dtype=np.float64).reshape(len(calibrators), n_scores, 2)
+        return cls(
+            weight=np.diag(1.0 / scale),
+            bias=-mean / scale,
+            landmarks=np.asarray(landmarks, dtype=np.float64),
+            map_weight=np.asarray(map_weight, dtype=np.float64),
+            map_bias=np.asarray(map_bias, dtype=np.float64),
+            coef=np.asarray(sgd.coef_, dtype=np.float64).T,
+            intercept=np.asarray(sgd.intercept_, dtype=np.float64),
+            calibration_a=calibration[..., 0],
+            calibration_b=calibration[..., 1],
+            classes=model.classes_,
+            kernel=kernel,
+            gamma=float(gamma),
+            feature_families=getattr(model, 'feature_families', getattr(pipeline, 'feature_families', None)),
+        )
+
+    # Inference
+    def transform(self, X):
+        """Scaler, then the kernel approximation"""
+        Z = np.asarray(X, dtype=np.float64) @ self.weight + self.bias
+        if self.kernel == 'nystroem':
+            sq_dist = np.einsum('ij,ij->i', Z, Z)[:, np.newaxis] + self.landmark_sq_norms - 2 * Z @ self.landmarks.T
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0)) @ self.map_weight
+        if self.kernel == 'rff':
+            return np.cos(Z @ self.map_weight + self.map_bias) * np.sqrt(2.0 / self.map_weight.shape[1])
+        raise ValueError(f"Unsupported kernel approximation: {self.kernel!r}")
+
+    def decision_values(self, X):
+        """SGDClassifier scores, shape (n_samples, 1 for two classes else n_classes)"""
+        with stage('model.kernel_map'):
+            features = self.transform(X)
+        with stage('model.linear'):
+            return features @ self.coef + self.intercept
+
+    def predict_with_proba(self, X):
+        """Predicted labels and class probabilities from a single pass"""
+        scores = self.decision_values(X)
+        with stage('model.probability'):
+            if len(self.calibration_a):
+                probabilities = np.mean([
+                    _normalise(_expit(-(a * scores + b))) for a, b in zip(self.calibration_a, self.calibration_b)
+                ], axis=0)
+                return self.classes_[np.argmax(probabilities, axis=1)], probabilities
+
+            probabilities = _normalise(_expit(scores))
+        indices = (scores[:, 0] > 0).astype(int) if scores.shape[1] == 1 else np.argmax(scores, axis=1)
+        return self.classes_[indices], probabilities
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+    def predict_proba(self, X):
+        return self.predict_with_proba(X)[1]
+
+
+def _expit(x):
+    e = np.exp(-np.abs(x))
+    return np.where(x >= 0, 1 / (1 + e), e / (1 + e))
+
+
+def _normalise(p):
+    """One-vs-rest probabilities to class probabilities: the complement for one
+    column (two classes), else normalised rows (uniform where a row sums to 0)"""
+    if p.shape[1] == 1:
+        return np.hstack([1 - p, p])
+    total = np.sum(p, axis=1, keepdims=True)
+    return np.divide(p, total, out=np.full_like(p, 1 / p.shape[1]), where=total != 0)
+
+
+def compile_pipeline(pipeline):
+    """Export step: a fitted scaler -> PCA -> SVC pipeline to a CompiledSVM, or a
+    large-scale model (svm_.large_scale) to a CompiledKernelApproximation"""
+    if hasattr(pipeline, 'calibrated_classifiers_') or 'sgd' in getattr(pipeline, 'named_steps', {}):
+        return CompiledKernelApproximation.from_model(pipeline)
+    return CompiledSVM.from_pipeline(pipeline)
+
+
+def check_compiled(compiled, pipeline, X, atol=1e-6):
+    """Raise AssertionError unless compiled matches pipeline's predict and predict_proba on X"""
+    labels, probabilities = compiled.predict_with_proba(X)
+    expected_labels = pipeline.predict(X)
+    expected_probabilities = pipeline.predict_proba(X)
+
+    mismatched = np.flatnonzero(labels != expected_labels)
+    if len(mismatched):
+        raise AssertionError(f"Compiled model disagrees on {len(mismatched)} predictions, e.g. row {mismatched[0]}")
+    error = np.max(np.abs(probabilities - expected_probabilities)) if len(X) else 0.0
+    if error > atol:
+        raise AssertionError(f"Compiled probabilities differ from sklearn by {error:.3g} (> {atol})")
+    return error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a trained SVM pipeline for fast inference.")
+    parser.add_argument('model_path', help="joblib file written by train_.main")
+    parser.add_argument('output_path')
+    args = parser.parse_args(argv)
+
+    from joblib import dump, load
+
+    # Import through the package so the pickle refers to svm_.compiled_model, not __main__
+    from svm_ import compiled_model
+    compiled = compiled_model.compile_pipeline(load(args.model_path))
+    dump(compiled, args.output_path)
+    print(f"Compiled model saved to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,16 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.pipeline import Pipeline
-from sklearn.decomposition import PCA
 import os
+from concurrent.futures import ProcessPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+from svm_.feature_extraction import extract_features_batch, load_clip
+
+CLASSES = {'normal': 0, 'early_fault': 1, 'failure': 2}
+
 
 # 1. Data Loading Function
-def load_audio_files(data_dir):
+def load_audio_files(data_dir, cache=None):
     """
     Load audio files from directory structure:
     data_dir/
@@ -29,28 +24,193 @@ def load_audio_files(data_dir):
         failure/
             file1.wav
             ...
+    Every file is decoded, since the waveforms are returned. With a FeatureCache,
+    each waveform is remembered with its file's key, so extract_features(X, cache=cache)
+    finds the vectors the other loaders cached for the same files.
     """
     X = []  # Features will go here
     y = []  # Labels will go here
-    classes = {'normal': 0, 'early_fault': 1, 'failure': 2}
     
-    for condition in classes.keys():
+    for file_path, label, audio, sr in iter_audio_files(data_dir):
+        if cache is not None:
+            cache.remember_file(audio, cache.file_key(file_path))
+        X.append((audio, sr))
+        y.append(label)
+    
+    return X, y
+
+
+def iter_audio_files(data_dir):
+    """
+    Lazily yield (file_path, label, audio, sr) for every .wav file under data_dir,
+    decoding each file only when it is requested. Files that fail to load are
+    reported and skipped.
+    """
+    for file_path, label in list_audio_files(data_dir):
+        # Load audio file (at the analysis rate)
+        try:
+            audio, sr = load_clip(file_path)
+            # print(f"Loaded {file_path}")
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+            continue
+        yield file_path, label, audio, sr
+
+
+def list_audio_files(data_dir):
+    """Return (file_path, label) pairs for every .wav file, in a deterministic order"""
+    files = []
+    
+    for condition, label in CLASSES.items():
         path = os.path.join(data_dir, condition)
         
         # Skip if directory doesn't exist
         if not os.path.isdir(path):
             continue
-            
-        for file in os.listdir(path):
+        
+        for file in sorted(os.listdir(path)):
             if file.endswith('.wav'):
-                file_path = os.path.join(path, file)
-                # Load audio file
-                try:
-                    audio, sr = librosa.load(file_path, sr=None)
-                    X.append((audio, sr))
-                    y.append(classes[condition])
-                    # print(f"Loaded {file_path}")
-                except Exception as e:
-                    print(f"Error loading {file_path}: {e}")
-    
-    return X, y
\ No newline at end of file
+                files.append((os.path.join(path, file), label))
+    
+    return files
+
+
+def _decode_and_extract(file_paths):
+    """Worker: decode a chunk of files and extract their features.
+    Returns one (features or None, error message or None) pair per file."""
+    results = [None] * len(file_paths)
+    audio_data, decoded = [], []
+    
+    for i, file_path in enumerate(file_paths):
+        try:
+            audio, sr = load_clip(file_path)
+            audio_data.append((audio, sr))
+            decoded.append(i)
+        except Exception as e:
+            results[i] = (None, f"Error loading {file_path}: {e}")
+    
+    try:
+        features = extract_features_batch(audio_data)
+        for i, row in zip(decoded, features):
+            results[i] = (row, None)
+    except Exception:
+        # Retry one clip at a time so a single bad file doesn't lose the chunk
+        for i, clip in zip(decoded, audio_data):
+            try:
+                results[i] = (extract_features_batch([clip])[0], None)
+            except Exception as e:
+                results[i] = (None, f"Error extracting features from {file_paths[i]}: {e}")
+    
+    return results
+
+
+# 1b. Parallel ingest: decode and extract features in a process pool
+def load_features_parallel(data_dir, n_jobs=None, chunk_size=16, cache=None):
+    """
+    Decode every .wav file under data_dir and extract its features using a pool
+    of n_jobs worker processes (default: all cores), chunk_size files per task.
+    
+    If a FeatureCache is given, files are looked up by content hash first and
+    only new or changed files are decoded; their vectors are added to the cache.
+    
+    Returns (features, labels) as arrays in list_audio_files order. Files that
+    fail to decode or featurise are reported and skipped without stopping the run.
+    """
+    files = list_audio_files(data_dir)
+    rows = [None] * len(files)
+    keys = [None] * len(files)
+    
+    pending = []
+    for i, (file_path, _) in enumerate(files):
+        if cache is not None:
+            keys[i] = cache.file_key(file_path)
+            rows[i] = cache.get(keys[i])
+        if rows[i] is None:
+            pending.append(i)
+    if cache is not None:
+        print(f"Feature cache: {len(files) - len(pending)} hits, {len(pending)} files to extract")
+    
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    if chunks:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            # map() yields chunk results in submission order, keeping file order deterministic
+            results = executor.map(_decode_and_extract, [[files[i][0] for i in chunk] for chunk in chunks])
+            for chunk, chunk_results in zip(chunks, results):
+                for i, (row, error) in zip(chunk, chunk_results):
+                    if error is not None:
+                        print(error)
+                        continue
+                    rows[i] = row
+                    if cache is not None:
+                        cache.put(keys[i], row)
+    
+    if cache is not None:
+        cache.flush()
+    
+    features = [row for row in rows if row is not None]
+    labels = [label for row, (_, label) in zip(rows, files) if row is not None]
+    return np.array(features), np.array(labels)
+
+
+# 1c. Streaming ingest: bounded memory, single process
+def iter_file_features(files, window=32, cache=None):
+    """
+    Yield (file_path, label, feature_vector) for (file_path, label) pairs, in order.
+    
+    With a FeatureCache, files are looked up by content hash before decoding, as in
+    load_features_parallel. The others are decoded and featurised as batches of
+    `window` clips, so at most `window` decoded waveforms are held at once.
+    Files that fail to load are reported and skipped.
+    """
+    batch, n_decoded = [], 0
+    for file_path, label in files:
+        key = cache.file_key(file_path) if cache is not None else None
+        feature_vector = cache.get(key) if cache is not None else None
+        clip = None
+        if feature_vector is None:
+            try:
+                clip = load_clip(file_path)
+            except Exception as e:
+                print(f"Error loading {file_path}: {e}")
+                continue
+            n_decoded += 1
+        batch.append([file_path, label, key, clip, feature_vector])
+        
+        if n_decoded >= window:
+            yield from _featurise_files(batch, cache)
+            batch, n_decoded = [], 0
+    
+    if batch:
+        yield from _featurise_files(batch, cache)
+
+
+def _featurise_files(batch, cache):
+    """Featurise the decoded entries of an iter_file_features batch and yield the batch"""
+    decoded = [entry for entry in batch if entry[3] is not None]
+    if decoded:
+        for entry, feature_vector in zip(decoded, extract_features_batch([entry[3] for entry in decoded])):
+            entry[4] = feature_vector
+            if cache is not None:
+                cache.put(entry[2], feature_vector)
+    for file_path, label, _, _, feature_vector in batch:
+        yield file_path, label, feature_vector
+
+
+def load_features_streaming(data_dir, window=32, cache=None):
+    """
+    Decode and featurise data_dir one window of files at a time, so that at most
+    `window` decoded waveforms are held in memory regardless of dataset size.
+    Cached files are not decoded (see iter_file_features).
+    
+    Returns (features, labels) as arrays in list_audio_files order.
+    """
+    features, labels = [], []
+    
+    for _, label, feature_vector in iter_file_features(list_audio_files(data_dir), window, cache):
+        features.append(feature_vector)
+        labels.append(label)
+    
+    if cache is not None:
+        cache.flush()
+    
+    return np.array(features), np.array(labels)
@@ -1,11 +1,10 @@
 import numpy as np
-import librosa
 import os
 import soundfile as sf
-import matplotlib.pyplot as plt
 # from scipy import signal
 from scipy.signal.windows import gaussian
 import random
+from concurrent.futures import ProcessPoolExecutor
 
 def create_directory(directory):
     """Create directory if it doesn't exist"""
@@ -13,16 +12,24 @@ def create_directory(directory):
         os.makedirs(directory)
         print(f"Created directory: {directory}")
 
-def simulate_normal_sound(duration=3.0, sr=22050):
+def random_source(rng=None):
+    """(uniform, normal, random) draws from a np.random.Generator, or from the
+    global random / np.random state when rng is None"""
+    if rng is None:
+        return random.uniform, np.random.normal, np.random.random
+    return rng.uniform, rng.normal, rng.random
+
+def simulate_normal_sound(duration=3.0, sr=22050, rng=None):
     """
     Simulate normal equipment sound
     - Steady frequency components
     - Low noise
     """
+    uniform, normal, rand = random_source(rng)
     t = np.linspace(0, duration, int(sr * duration), endpoint=False)
     
     # Base frequency components (e.g., motor rotation)
-    base_freq = random.uniform(40, 60)  # Base frequency in Hz
+    base_freq = uniform(40, 60)  # Base frequency in Hz
     
     # Create signal with fundamental frequency and harmonics
     audio = 0.5 * np.sin(2 * np.pi * base_freq * t)
@@ -31,12 +38,12 @@ def simulate_normal_sound(duration=3.0, sr=22050):
     audio += 0.1 * np.sin(2 * np.pi * base_freq * 4 * t)
     
     # Add background noise (low level)
-    noise = np.random.normal(0, 0.05, len(t))
+    noise = normal(0, 0.05, len(t))
     audio += noise
     
     # Add small random amplitude modulation
-    am_freq = random.uniform(0.2, 1.0)
-    am_depth = random.uniform(0.02, 0.1)
+    am_freq = uniform(0.2, 1.0)
+    am_depth = uniform(0.02, 0.1)
     am = 1 + am_depth * np.sin(2 * np.pi * am_freq * t)
     audio *= am
     
@@ -45,7 +52,7 @@ def simulate_normal_sound(duration=3.0, sr=22050):
     
     return audio, sr
 
-def simulate_early_fault_sound(duration=3.0, sr=22050):
+def simulate_early_fault_sound(duration=3.0, sr=22050, rng=None):
     """
     Simulate early fault equipment sound
     - Same base frequency as normal
@@ -53,10 +60,11 @@ def simulate_early_fault_sound(duration=3.0, sr=22050):
     - Slightly higher noise
     - Small periodic pulse (early bearing fault)
     """
+    uniform, normal, rand = random_source(rng)
     t = np.linspace(0, duration, int(sr * duration), endpoint=False)
     
     # Base frequency components (similar to normal)
-    base_freq = random.uniform(40, 60)
+    base_freq = uniform(40, 60)
     
     # Create signal with fundamental frequency and harmonics
     audio = 0.5 * np.sin(2 * np.pi * base_freq * t)
@@ -65,32 +73,32 @@ def simulate_early_fault_sound(duration=3.0, sr=22050):
     audio += 0.1 * np.sin(2 * np.pi * base_freq * 4 * t)
     
     # Add background noise (medium level)
-    noise = np.random.normal(0, 0.1, len(t))
+    noise = normal(0, 0.1, len(t))
     audio += noise
     
     # Add intermittent high-frequency component (early fault indicator)
-    fault_freq = random.uniform(500, 2000)  # Fault frequency
-    fault_strength = random.uniform(0.05, 0.2)
-    fault_intervals = np.random.random(len(t)) < 0.2  # Occurs ~20% of the time
+    fault_freq = uniform(500, 2000)  # Fault frequency
+    fault_strength = uniform(0.05, 0.2)
+    fault_intervals = rand(len(t)) < 0.2  # Occurs ~20% of the time
     fault_component = fault_strength * np.sin(2 * np.pi * fault_freq * t) * fault_intervals
     audio += fault_component
     
     # Add small periodic pulse (simulating early bearing fault)
-    pulse_rate = random.uniform(8, 15)  # Pulses per second
+    pulse_rate = uniform(8, 15)  # Pulses per second
     pulse_width = int(sr * 0.01)  # 10ms pulse width
     num_pulses = int(duration * pulse_rate)
+    pulse_shape = gaussian(pulse_width, std=pulse_width/6)
     
     for i in range(num_pulses):
-        pulse_time = random.uniform(0, duration)
+        pulse_time = uniform(0, duration)
         pulse_pos = int(pulse_time * sr)
         if pulse_pos + pulse_width < len(audio):
-            pulse_shape = gaussian(pulse_width, std=pulse_width/6)
-            pulse_strength = random.uniform(0.05, 0.15)
+            pulse_strength = uniform(0.05, 0.15)
             audio[pulse_pos:pulse_pos+pulse_width] += pulse_shape * pulse_strength
     
     # Add amplitude modulation
-    am_freq = random.uniform(0.2, 1.0)
-    am_depth = random.uniform(0.1, 0.2)
+    am_freq = uniform(0.2, 1.0)
+    am_depth = uniform(0.1, 0.2)
     am = 1 + am_depth * np.sin(2 * np.pi * am_freq * t)
     audio *= am
     
@@ -99,7 +107,7 @@ def simulate_early_fault_sound(duration=3.0, sr=22050):
     
     return audio, sr
 
-def simulate_failure_sound(duration=3.0, sr=22050):
+def simulate_failure_sound(duration=3.0, sr=22050, rng=None):
     """
     Simulate failure equipment sound
     - Irregular frequency components
@@ -107,10 +115,11 @@ def simulate_failure_sound(duration=3.0, sr=22050):
     - Strong irregular pulses
     - Possible frequency shifts
     """
+    uniform, normal, rand = random_source(rng)
     t = np.linspace(0, duration, int(sr * duration), endpoint=False)
     
     # Base frequency components with instability
-    base_freq = random.uniform(35, 65)  # More variation than normal
+    base_freq = uniform(35, 65)  # More variation than normal
     
     # Create unstable signal with fundamental frequency and harmonics
     # Add frequency wobble to simulate instability
@@ -122,36 +131,36 @@ def simulate_failure_sound(duration=3.0, sr=22050):
     audio += 0.1 * np.sin(2 * np.pi * base_freq * 4 * (1 + wobble) * t)
     
     # Add strong background noise
-    noise = np.random.normal(0, 0.2, len(t))
+    noise = normal(0, 0.2, len(t))
     audio += noise
     
     # Add stronger high-frequency components
     for _ in range(3):
-        fault_freq = random.uniform(1000, 4000)
-        fault_strength = random.uniform(0.15, 0.3)
+        fault_freq = uniform(1000, 4000)
+        fault_strength = uniform(0.15, 0.3)
         audio += fault_strength * np.sin(2 * np.pi * fault_freq * t)
     
     # Add strong irregular pulses (simulating severe faults)
-    pulse_rate = random.uniform(15, 30)  # More pulses per second
+    pulse_rate = uniform(15, 30)  # More pulses per second
     pulse_width = int(sr * 0.02)  # 20ms pulse width
     num_pulses = int(duration * pulse_rate)
+    pulse_shape = gaussian(pulse_width, std=pulse_width/5)
     
     for i in range(num_pulses):
-        pulse_time = random.uniform(0, duration)
+        pulse_time = uniform(0, duration)
         pulse_pos = int(pulse_time * sr)
         if pulse_pos + pulse_width < len(audio):
-            pulse_shape = gaussian(pulse_width, std=pulse_width/5)
-            pulse_strength = random.uniform(0.2, 0.5)
+            pulse_strength = uniform(0.2, 0.5)
             audio[pulse_pos:pulse_pos+pulse_width] += pulse_shape * pulse_strength
     
     # Add strong amplitude modulation
-    am_freq = random.uniform(0.5, 2.0)
-    am_depth = random.uniform(0.2, 0.4)
+    am_freq = uniform(0.5, 2.0)
+    am_depth = uniform(0.2, 0.4)
     am = 1 + am_depth * np.sin(2 * np.pi * am_freq * t)
     audio *= am
     
     # Add occasional dropouts (equipment stopping/starting)
-    dropout_points = np.random.random(len(t)) < 0.05
+    dropout_points = rand(len(t)) < 0.05
     audio[dropout_points] *= 0.2
     
     # Normalize
@@ -159,13 +168,115 @@ def simulate_failure_sound(duration=3.0, sr=22050):
     
     return audio, sr
 
-def add_environmental_noise(audio, noise_level=0.05):
+def add_environmental_noise(audio, noise_level=0.05, rng=None):
     """Add environmental noise to audio"""
-    noise = np.random.normal(0, noise_level, len(audio))
+    _, normal, _ = random_source(rng)
+    noise = normal(0, noise_level, len(audio))
     return audio + noise
 
+def _harmonics(phase, amplitudes):
+    """sum_k amplitudes[k - 1] * sin(k * phase), using one sin and one cos:
+    sin((k + 1)x) = 2 cos(x) sin(kx) - sin((k - 1)x)"""
+    sin_1, twice_cos = np.sin(phase), 2 * np.cos(phase)
+    previous, current = np.zeros_like(phase), sin_1
+    audio = amplitudes[0] * sin_1
+    for amplitude in amplitudes[1:]:
+        previous, current = current, twice_cos * current - previous
+        audio += amplitude * current
+    return audio
+
+def _add_pulses(audio, sr, duration, rng, rate, width_seconds, std_fraction, strength):
+    """Add Gaussian pulses at uniform random times to every clip: pulse counts
+    follow each clip's rate, and all pulses land with one scatter-add"""
+    n, length = audio.shape
+    pulse_width = int(sr * width_seconds)
+    pulse_shape = gaussian(pulse_width, std=pulse_width * std_fraction).astype(audio.dtype)
+    num_pulses = (duration * rng.uniform(*rate, size=n)).astype(int)
+    
+    slots = np.arange(num_pulses.max(initial=0))
+    positions = (rng.uniform(0, duration, size=(n, len(slots))) * sr).astype(int)
+    strengths = rng.uniform(*strength, size=(n, len(slots))).astype(audio.dtype)
+    keep = (slots < num_pulses[:, np.newaxis]) & (positions + pulse_width < length)
+    
+    rows, pulses = np.nonzero(keep)
+    starts = rows * length + positions[rows, pulses]
+    np.add.at(audio.reshape(-1), starts[:, np.newaxis] + np.arange(pulse_width),
+              strengths[rows, pulses][:, np.newaxis] * pulse_shape)
+
+def simulate_batch(condition, n, duration=3.0, sr=22050, rng=None, noise_level=(0.01, 0.05), block_size=16):
+    """
+    Simulate n clips of one class as an (n, samples) float32 array, vectorised
+    across clips (block_size clips at a time, to stay cache-sized).
+    
+    Draws clip parameters from the same distributions as the simulate_* functions
+    followed by add_environmental_noise (level uniform in noise_level), but not
+    from the same random stream, so clips differ from theirs for a given seed.
+    """
+    if condition not in SIMULATORS:
+        raise ValueError(f"Unknown condition: {condition!r}")
+    rng = np.random.default_rng() if rng is None else rng
+    t = np.linspace(0, duration, int(sr * duration), endpoint=False, dtype=np.float32)
+    audio = np.empty((n, len(t)), dtype=np.float32)
+    for start in range(0, n, block_size):
+        audio[start:start + block_size] = _simulate_block(condition, min(block_size, n - start), t, duration, sr, rng,
+                                                          noise_level)
+    return audio, sr
+
+def _simulate_block(condition, n, t, duration, sr, rng, noise_level):
+    column = lambda low, high: rng.uniform(low, high, size=(n, 1)).astype(np.float32)
+    noise = lambda: rng.standard_normal((n, len(t)), dtype=np.float32)
+    
+    if condition == 'normal':
+        audio = _harmonics(2 * np.pi * column(40, 60) * t, (0.5, 0.3, 0.15, 0.1))
+        audio += 0.05 * noise()
+        am_freq, am_depth, peak = column(0.2, 1.0), column(0.02, 0.1), 0.8
+    elif condition == 'early_fault':
+        audio = _harmonics(2 * np.pi * column(40, 60) * t, (0.5, 0.3, 0.15, 0.1))
+        audio += 0.1 * noise()
+        fault_freq, fault_strength = column(500, 2000), column(0.05, 0.2)
+        audio += fault_strength * np.sin(2 * np.pi * fault_freq * t) * (rng.random(audio.shape, dtype=np.float32) < 0.2)
+        _add_pulses(audio, sr, duration, rng, rate=(8, 15), width_seconds=0.01, std_fraction=1/6, strength=(0.05, 0.15))
+        am_freq, am_depth, peak = column(0.2, 1.0), column(0.1, 0.2), 0.8
+    else:
+        wobble = 0.05 * np.sin(2 * np.pi * 0.5 * t)
+        audio = _harmonics(2 * np.pi * column(35, 65) * (1 + wobble) * t, (0.4, 0.25, 0.15, 0.1))
+        audio += 0.2 * noise()
+        for _ in range(3):
+            audio += column(0.15, 0.3) * np.sin(2 * np.pi * column(1000, 4000) * t)
+        _add_pulses(audio, sr, duration, rng, rate=(15, 30), width_seconds=0.02, std_fraction=1/5, strength=(0.2, 0.5))
+        am_freq, am_depth, peak = column(0.5, 2.0), column(0.2, 0.4), 0.9
+    
+    audio *= 1 + am_depth * np.sin(2 * np.pi * am_freq * t)
+    if condition == 'failure':
+        # Occasional dropouts (equipment stopping/starting)
+        audio[rng.random(audio.shape, dtype=np.float32) < 0.05] *= 0.2
+    audio *= peak / np.max(np.abs(audio), axis=1, keepdims=True)
+    
+    audio += column(*noise_level) * noise()
+    return audio
+
+def synthetic_features(num_samples, duration=3.0, sr=22050, seed=0):
+    """
+    Feature matrix and labels (dataset_extraction.CLASSES order) for num_samples
+    simulated clips per class, synthesised with simulate_batch and featurised in
+    memory - no WAV files are written or read.
+    """
+    from svm_.feature_extraction import extract_features_batch
+    
+    rng = np.random.default_rng(seed)
+    features, labels = [], []
+    for label, condition in enumerate(SIMULATORS):
+        audio, sr = simulate_batch(condition, num_samples, duration, sr, rng=rng)
+        features.append(extract_features_batch([(clip, sr) for clip in audio]))
+        labels.extend([label] * num_samples)
+    return np.vstack(features), np.array(labels)
+
 def visualize_examples(normal, early_fault, failure, sr):
     """Visualize example waveforms and spectrograms"""
+    import librosa
+    import librosa.display
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(15, 12))
     
     # Waveforms
@@ -271,6 +382,55 @@ def generate_dataset(output_dir, num_samples=50, sr=22050):
     
     return output_dir
 
+# Class directory -> simulator, in generate_dataset order
+SIMULATORS = {
+    'normal': simulate_normal_sound,
+    'early_fault': simulate_early_fault_sound,
+    'failure': simulate_failure_sound,
+}
+
+def sample_rng(seed, class_index, index):
+    """Generator for one clip, derived from the dataset seed and the clip's position alone"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(class_index, index)))
+
+def _generate_chunk(tasks):
+    """Worker: simulate and write a chunk of (output_dir, class_index, index, seed, sr) clips"""
+    for output_dir, class_index, index, seed, sr in tasks:
+        condition = list(SIMULATORS)[class_index]
+        rng = sample_rng(seed, class_index, index)
+        duration = rng.uniform(2.0, 5.0)
+        audio, sr = SIMULATORS[condition](duration, sr, rng=rng)
+        audio = add_environmental_noise(audio, noise_level=rng.uniform(0.01, 0.05), rng=rng)
+        sf.write(os.path.join(output_dir, condition, f"{condition}_{index+1:03d}.wav"), audio, sr)
+    return len(tasks)
+
+def generate_dataset_parallel(output_dir, num_samples=50, sr=22050, seed=42, n_jobs=None, chunk_size=32):
+    """
+    Parallel counterpart of generate_dataset (same layout and file names, no plots).
+    
+    Every clip draws from its own generator seeded by (seed, class, index), so the
+    dataset is identical for any n_jobs. Workers (default: all cores) simulate
+    and write chunk_size clips per task.
+    """
+    create_directory(output_dir)
+    for condition in SIMULATORS:
+        create_directory(os.path.join(output_dir, condition))
+    
+    tasks = [(output_dir, class_index, i, seed, sr)
+             for class_index in range(len(SIMULATORS)) for i in range(num_samples)]
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    
+    print(f"Generating {len(tasks)} samples ({num_samples} per class)...")
+    done = 0
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for count in executor.map(_generate_chunk, chunks):
+            done += count
+            if done % (10 * chunk_size) < count or done == len(tasks):
+                print(f"  Generated {done}/{len(tasks)} samples")
+    
+    print(f"\nDataset generation complete. Files saved to {output_dir}")
+    return output_dir
+
 if __name__ == "__main__":
     # Set random seed for reproducibility
     np.random.seed(42)
@@ -282,8 +442,15 @@ if __name__ == "__main__":
     # Number of samples per class
     num_samples = 50
     
+    # Parallel generation uses per-sample seeds: identical output for any number
+    # of workers (but different clips from the serial, globally seeded run)
+    parallel = False
+    
     # Generate the dataset
-    dataset_path = generate_dataset(output_dir, num_samples)
+    if parallel:
+        dataset_path = generate_dataset_parallel(output_dir, num_samples, seed=42)
+    else:
+        dataset_path = generate_dataset(output_dir, num_samples)
     
     print(f"""
     Dataset generated successfully!
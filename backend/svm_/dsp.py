@@ -0,0 +1,190 @@
+'''
+NumPy versions of the librosa routines the feature engine relies on.
+
+They follow librosa 0.11 step for step (same padding, window, filterbank
+construction and dtypes), so features match the librosa implementation,
+but importing them costs nothing: librosa pulls in numba, scipy.signal and
+JIT-compiles its stencils on first use, which dominated worker cold start.
+'''
+import functools
+
+import numpy as np
+
+
+# Framing and STFT
+@functools.lru_cache(maxsize=None)
+def hann_window(n):
+    """Periodic Hann window, as scipy.signal.get_window('hann', n, fftbins=True)"""
+    fac = np.linspace(-np.pi, np.pi, n + 1)
+    window = np.zeros(n + 1)
+    for k, a in enumerate((0.5, 0.5)):
+        window += a * np.cos(k * fac)
+    window = window[:-1]
+    window.setflags(write=False)
+    return window
+
+
+def frame(y, frame_length, hop_length):
+    """Overlapping frames of the last axis as a view: (..., frame_length, n_frames)"""
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length, axis=-1)[..., ::hop_length, :]
+    return np.swapaxes(frames, -1, -2)
+
+
+def stft_magnitude(y, n_fft, hop_length):
+    """|librosa.stft(y, n_fft, hop_length)|: centred, zero-padded, Hann-windowed"""
+    padding = [(0, 0)] * (y.ndim - 1) + [(n_fft // 2, n_fft // 2)]
+    frames = frame(np.pad(y, padding), n_fft, hop_length)
+    spectrum = np.fft.rfft(hann_window(n_fft)[:, np.newaxis] * frames, axis=-2)
+    return np.abs(spectrum.astype(np.complex64 if y.dtype == np.float32 else np.complex128))
+
+
+def normalize(S, axis=0):
+    """librosa.util.normalize(S, norm=np.inf, axis=axis): scale to unit peak, leaving silence alone"""
+    length = np.max(np.abs(S), axis=axis, keepdims=True)
+    length = np.where(length < np.finfo(S.dtype if S.dtype.kind == 'f' else np.float32).tiny, 1, length)
+    return S / length
+
+
+@functools.lru_cache(maxsize=None)
+def dct_matrix(n_input, n_output):
+    """Orthonormal DCT-II basis: dct(x, type=2, norm='ortho')[:n_output] == dct_matrix @ x"""
+    k = np.arange(n_output)[:, np.newaxis]
+    n = np.arange(n_input)[np.newaxis, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_input)) * np.sqrt(2.0 / n_input)
+    basis[0] /= np.sqrt(2.0)
+    basis.setflags(write=False)
+    return basis
+
+
+# Frequency scales
+def fft_frequencies(sr, n_fft):
+    return np.fft.rfftfreq(n=n_fft, d=1.0 / sr)
+
+
+def hz_to_mel(frequencies):
+    """Slaney mel scale"""
+    frequencies = np.asanyarray(frequencies, dtype=np.float64)
+    f_sp = 200.0 / 3
+    mels = frequencies / f_sp
+    min_log_hz, min_log_mel, logstep = 1000.0, 1000.0 / f_sp, np.log(6.4) / 27.0
+    return np.where(frequencies >= min_log_hz,
+                    min_log_mel + np.log(np.maximum(frequencies, min_log_hz) / min_log_hz) / logstep, mels)
+
+
+def mel_to_hz(mels):
+    """Inverse of hz_to_mel"""
+    mels = np.asanyarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    freqs = f_sp * mels
+    min_log_hz, min_log_mel, logstep = 1000.0, 1000.0 / f_sp, np.log(6.4) / 27.0
+    return np.where(mels >= min_log_mel, min_log_hz * np.exp(logstep * (mels - min_log_mel)), freqs)
+
+
+def hz_to_octs(frequencies, tuning=0.0, bins_per_octave=12):
+    a440 = 440.0 * 2.0 ** (tuning / bins_per_octave)
+    return np.log2(np.asanyarray(frequencies) / (float(a440) / 16))
+
+
+# Filterbanks
+def mel_filterbank(sr, n_fft, n_mels=128):
+    """librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels): Slaney-normalised, float32"""
+    weights = np.zeros((n_mels, 1 + n_fft // 2), dtype=np.float32)
+    fftfreqs = fft_frequencies(sr, n_fft)
+    mel_f = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(float(sr) / 2), n_mels + 2))
+
+    fdiff = np.diff(mel_f)
+    ramps = np.subtract.outer(mel_f, fftfreqs)
+    for i in range(n_mels):
+        lower = -ramps[i] / fdiff[i]
+        upper = ramps[i + 2] / fdiff[i + 1]
+        weights[i] = np.maximum(0, np.minimum(lower, upper))
+
+    enorm = 2.0 / (mel_f[2:n_mels + 2] - mel_f[:n_mels])
+    weights *= enorm[:, np.newaxis]
+    return weights
+
+
+def chroma_filterbank(sr, n_fft, tuning=0.0, n_chroma=12, ctroct=5.0, octwidth=2):
+    """librosa.filters.chroma(sr=sr, n_fft=n_fft, tuning=tuning), float32"""
+    frequencies = np.linspace(0, sr, n_fft, endpoint=False)[1:]
+    frqbins = n_chroma * hz_to_octs(frequencies, tuning=tuning, bins_per_octave=n_chroma)
+    frqbins = np.concatenate(([frqbins[0] - 1.5 * n_chroma], frqbins))
+    binwidthbins = np.concatenate((np.maximum(frqbins[1:] - frqbins[:-1], 1.0), [1]))
+
+    D = np.subtract.outer(frqbins, np.arange(0, n_chroma, dtype='d')).T
+    n_chroma2 = np.round(float(n_chroma) / 2)
+    D = np.remainder(D + n_chroma2 + 10 * n_chroma, n_chroma) - n_chroma2
+
+    wts = np.exp(-0.5 * (2 * D / np.tile(binwidthbins, (n_chroma, 1))) ** 2)
+    # Column L2 normalisation
+    length = np.sqrt(np.sum(wts ** 2, axis=0, keepdims=True))
+    wts = wts / np.where(length < np.finfo(wts.dtype).tiny, 1, length)
+    wts *= np.tile(np.exp(-0.5 * (((frqbins / n_chroma - ctroct) / octwidth) ** 2)), (n_chroma, 1))
+    wts = np.roll(wts, -3 * (n_chroma // 12), axis=0)
+    return np.ascontiguousarray(wts[:, :int(1 + n_fft / 2)], dtype=np.float32)
+
+
+# Tuning estimation
+def localmax(x, axis=-2):
+    """librosa.util.localmax: x[i] > x[i - 1] and x[i] >= x[i + 1]; never the first element"""
+    x = np.swapaxes(x, -1, axis)
+    peaks = np.zeros(x.shape, dtype=bool)
+    peaks[..., 1:-1] = (x[..., 1:-1] > x[..., :-2]) & (x[..., 1:-1] >= x[..., 2:])
+    peaks[..., -1] = x[..., -1] > x[..., -2]
+    return np.swapaxes(peaks, -1, axis)
+
+
+def parabolic_interpolation(x, axis=-2):
+    """Offset of the parabola through each point and its neighbours (0 if more than a bin away)"""
+    x = np.swapaxes(x, -1, axis)
+    left, centre, right = (x[..., :-2].astype(np.float64), x[..., 1:-1].astype(np.float64),
+                           x[..., 2:].astype(np.float64))
+    a = right + left - 2 * centre
+    b = (right - left) / 2
+    shifts = np.zeros(x.shape, dtype=x.dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shifts[..., 1:-1] = np.where(np.abs(b) >= np.abs(a), 0, -b / a)
+    return np.swapaxes(shifts, -1, axis)
+
+
+def piptrack(S, sr, n_fft, fmin=150.0, fmax=4000.0, threshold=0.1):
+    """librosa.piptrack(S=S, sr=sr, n_fft=n_fft): interpolated spectral peaks per frame"""
+    S = np.abs(S)
+    fmax = min(fmax, float(sr) / 2)
+    fft_freqs = fft_frequencies(sr, n_fft)
+
+    avg = np.gradient(S, axis=-2)
+    shift = parabolic_interpolation(S, axis=-2)
+    dskew = 0.5 * avg * shift
+
+    pitches = np.zeros_like(S)
+    mags = np.zeros_like(S)
+
+    freq_mask = ((fmin <= fft_freqs) & (fft_freqs < fmax))[:, np.newaxis]
+    ref_value = threshold * np.max(S, axis=-2, keepdims=True)
+    idx = np.nonzero(freq_mask & localmax(S * (S > ref_value), axis=-2))
+    pitches[idx] = (idx[-2] + shift[idx]) * float(sr) / n_fft
+    mags[idx] = S[idx] + dskew[idx]
+    return pitches, mags
+
+
+def pitch_tuning(frequencies, resolution=0.01, bins_per_octave=12):
+    """librosa.pitch_tuning: the most common deviation from A440 tuning, in fractions of a bin"""
+    frequencies = np.atleast_1d(frequencies)
+    frequencies = frequencies[frequencies > 0]
+    if not np.any(frequencies):
+        return 0.0
+
+    residual = np.mod(bins_per_octave * hz_to_octs(frequencies), 1.0)
+    residual[residual >= 0.5] -= 1.0
+    bins = np.linspace(-0.5, 0.5, int(np.ceil(1.0 / resolution)) + 1)
+    counts, tuning = np.histogram(residual, bins)
+    return float(tuning[np.argmax(counts)])
+
+
+def estimate_tuning(S, sr, n_fft, bins_per_octave=12):
+    """librosa.estimate_tuning(S=S, sr=sr, n_fft=n_fft)"""
+    pitch, mag = piptrack(S, sr, n_fft)
+    pitch_mask = pitch > 0
+    threshold = np.median(mag[pitch_mask]) if pitch_mask.any() else 0.0
+    return pitch_tuning(pitch[(mag >= threshold) & pitch_mask], bins_per_octave=bins_per_octave)
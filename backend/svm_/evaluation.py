@@ -1,15 +1,6 @@
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
 from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.pipeline import Pipeline
-from sklearn.decomposition import PCA
-import os
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from svm_.feature_extraction import cache_fingerprint
+
+CHECK_BYTES = 16
+
+
+class FeatureCache:
+    """
+    Persistent, content-addressed store of feature vectors.
+
+    Vectors are kept as float32 rows of one memory-mapped file, inside a
+    directory named after the feature configuration fingerprint, so changing
+    frame/hop lengths, n_mfcc or library versions never serves stale vectors.
+    The store holds at most max_bytes of vectors; once full, the least
+    recently used entry is overwritten.
+
+    The index only reaches disk on flush(), so after a crash, or with two
+    runs sharing the directory, it can name a slot that has since been given
+    to another key. Every slot therefore also stores a checksum of its key and
+    vector, written after the vector; get() treats a slot whose checksum does
+    not match as a miss and drops the entry.
+
+    Files are keyed by their bytes (file_key), looked up before they are
+    decoded; in-memory waveforms by their samples (array_key). Waveforms a
+    file loader decoded are remembered with their file's key (waveform_key),
+    so both kinds of caller share the same entries.
+
+    Usage:
+        with FeatureCache("feature_cache") as cache:
+            features, labels = load_features_parallel(data_dir, cache=cache)
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 ** 2):
+        self.directory = os.path.join(cache_dir, cache_fingerprint())
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._index_path = os.path.join(self.directory, "index.json")
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._checks_path = os.path.join(self.directory, "checks.u8")
+        self._entries = OrderedDict()  # key -> slot, least recently used first
+        self._vectors = None
+        self._checks = None  # one slot_check per slot
+        self._dim = None
+        self._capacity = None
+        self._free_slots = []
+        self._file_keys = {}  # id(waveform) -> (weak reference to it, file key)
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+
+    # Keys
+    @staticmethod
+    def file_key(file_path):
+        """Key for the raw bytes of an audio file"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return "file:" + digest.hexdigest()
+
+    @staticmethod
+    def array_key(audio, sr):
+        """Key for a decoded waveform and its sample rate"""
+        audio = np.ascontiguousarray(audio)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{audio.dtype.str}:{sr}:".encode())
+        digest.update(audio.data)
+        return "pcm:" + digest.hexdigest()
+
+    @staticmethod
+    def slot_check(key, vector):
+        """Checksum of a key and the float32 vector stored for it"""
+        digest = hashlib.blake2b(key.encode(), digest_size=CHECK_BYTES)
+        digest.update(np.ascontiguousarray(vector, dtype=np.float32).data)
+        return np.frombuffer(digest.digest(), dtype=np.uint8)
+
+    def remember_file(self, audio, key):
+        """Record that a decoded waveform came from the file with this file_key"""
+        self._file_keys[id(audio)] = (weakref.ref(audio, lambda _, i=id(audio): self._file_keys.pop(i, None)), key)
+
+    def waveform_key(self, audio, sr):
+        """The file_key of a waveform decoded by a file loader, else its array_key"""
+        entry = self._file_keys.get(id(audio))
+        if entry is not None and entry[0]() is audio:
+            return entry[1]
+        return self.array_key(audio, sr)
+
+    # Lookup
+    def get(self, key):
+        """Return the cached vector for key as float64, or None"""
+        slot = self._entries.get(key)
+        if slot is not None and not np.array_equal(self._checks[slot], self.slot_check(key, self._vectors[slot])):
+            # The slot was reused for another key after the index was last flushed
+            del self._entries[key]
+            slot = None
+        if slot is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._vectors[slot].astype(np.float64)
+
+    def put(self, key, vector):
+        """Store a feature vector, evicting the least recently used entry if full"""
+        vector = np.asarray(vector, dtype=np.float32)
+        if self._vectors is None:
+            self._create(vector.shape[0])
+        if vector.shape != (self._dim,):
+            raise ValueError(f"Expected a feature vector of length {self._dim}, got {vector.shape}")
+
+        slot = self._entries.get(key)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                _, slot = self._entries.popitem(last=False)
+        self._entries[key] = slot
+        self._entries.move_to_end(key)
+        # Invalidate the slot before rewriting it, so an interrupted put never leaves a valid-looking slot
+        self._checks[slot] = 0
+        self._vectors[slot] = vector
+        self._checks[slot] = self.slot_check(key, vector)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Persistence
+    def flush(self):
+        """Write vectors and index to disk (the index is replaced atomically)"""
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        self._checks.flush()
+        index = {'dim': self._dim, 'capacity': self._capacity, 'entries': list(self._entries.items())}
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def _open(self):
+        if not all(os.path.exists(path) for path in (self._index_path, self._vectors_path, self._checks_path)):
+            return
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+            dim, capacity = index['dim'], index['capacity']
+            if capacity != self._capacity_for(dim):
+                # max_bytes changed: start over rather than reshaping the store
+                return
+            vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(capacity, dim))
+            checks = np.memmap(self._checks_path, dtype=np.uint8, mode='r+', shape=(capacity, CHECK_BYTES))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable feature cache in {self.directory}: {e}")
+            return
+
+        self._vectors, self._checks = vectors, checks
+        self._dim, self._capacity = dim, capacity
+        self._entries = OrderedDict((key, slot) for key, slot in index['entries'])
+        used = set(self._entries.values())
+        self._free_slots = [slot for slot in range(capacity - 1, -1, -1) if slot not in used]
+
+    def _create(self, dim):
+        self._dim = dim
+        self._capacity = self._capacity_for(dim)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='w+', shape=(self._capacity, dim))
+        self._checks = np.memmap(self._checks_path, dtype=np.uint8, mode='w+', shape=(self._capacity, CHECK_BYTES))
+        self._entries = OrderedDict()
+        self._free_slots = list(range(self._capacity - 1, -1, -1))
+
+    def _capacity_for(self, dim):
+        return max(1, self.max_bytes // (dim * np.dtype(np.float32).itemsize))
@@ -0,0 +1,269 @@
+import functools
+import os
+
+import numpy as np
+
+from svm_ import dsp
+from svm_.instrumentation import stage
+
+# STFT settings shared by every spectral feature family (librosa defaults,
+# so vectors match the per-feature librosa calls the models were trained on)
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+
+# Canonical analysis rate: every clip is resampled to it once, when it is decoded,
+# in training and serving alike, so frames and frequency bins mean the same thing
+# for every source. ANALYSIS_SR=0 keeps each file's native rate.
+ANALYSIS_SR = int(os.environ.get("ANALYSIS_SR", 22050)) or None
+
+# Feature families in vector order, with the number of values each contributes.
+# Every family except time_domain is computed from the shared spectrogram.
+FAMILIES = (
+    ('time_domain', 4),
+    ('mfcc', 2 * N_MFCC),
+    ('spectral_shape', 6),
+    ('chroma', 12),
+    ('contrast', 7),
+)
+FAMILY_NAMES = tuple(name for name, _ in FAMILIES)
+
+
+def canonical_families(families):
+    """families in vector order, or None for the full vector; raises ValueError for unknown names"""
+    if families is None:
+        return None
+    unknown = set(families) - set(FAMILY_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown feature families: {sorted(unknown)}; choose from {FAMILY_NAMES}")
+    families = tuple(name for name in FAMILY_NAMES if name in families)
+    if not families:
+        raise ValueError("At least one feature family is required")
+    return None if families == FAMILY_NAMES else families
+
+
+def family_columns(families):
+    """Indices of the given families' values in the full feature vector"""
+    families = canonical_families(families) or FAMILY_NAMES
+    columns, start = [], 0
+    for name, size in FAMILIES:
+        if name in families:
+            columns.extend(range(start, start + size))
+        start += size
+    return np.array(columns)
+
+
+# Cached analysis tables
+@functools.lru_cache(maxsize=None)
+def fft_frequencies(sr, n_fft=N_FFT):
+    """Centre frequency of every STFT bin, shaped for broadcasting over frames"""
+    freq = dsp.fft_frequencies(sr, n_fft).reshape(-1, 1)
+    freq.setflags(write=False)
+    return freq
+
+
+@functools.lru_cache(maxsize=None)
+def mel_filterbank(sr, n_fft=N_FFT):
+    """Mel filterbank used for the MFCCs"""
+    basis = dsp.mel_filterbank(sr, n_fft)
+    basis.setflags(write=False)
+    return basis
+
+
+@functools.lru_cache(maxsize=1024)
+def chroma_filterbank(sr, n_fft, tuning):
+    """Chroma filterbank; tuning is quantised to 0.01 bins so the key space is small"""
+    basis = dsp.chroma_filterbank(sr, n_fft, tuning)
+    basis.setflags(write=False)
+    return basis
+
+
+@functools.lru_cache(maxsize=None)
+def contrast_bands(sr, n_fft=N_FFT, n_bands=6, fmin=200.0, quantile=0.02):
+    """Octave sub-band selections used by spectral contrast (as in librosa)"""
+    freq = fft_frequencies(sr, n_fft)[:, 0]
+
+    octa = np.zeros(n_bands + 2)
+    octa[1:] = fmin * (2.0 ** np.arange(0, n_bands + 1))
+    if np.any(octa[:-1] >= 0.5 * sr):
+        raise ValueError("Frequency band exceeds Nyquist. Reduce either fmin or n_bands.")
+
+    bands = []
+    for k, (f_low, f_high) in enumerate(zip(octa[:-1], octa[1:])):
+        current_band = np.logical_and(freq >= f_low, freq <= f_high)
+        idx = np.flatnonzero(current_band)
+        if k > 0:
+            current_band[idx[0] - 1] = True
+        if k == n_bands:
+            current_band[idx[-1] + 1:] = True
+
+        rows = np.flatnonzero(current_band)
+        if k < n_bands:
+            rows = rows[:-1]
+
+        # Always take at least one bin from each side
+        n_quantile = int(np.maximum(np.rint(quantile * np.sum(current_band)), 1))
+        bands.append((rows, n_quantile))
+    return tuple(bands)
+
+
+def spectrogram(audio):
+    """Magnitude spectrogram computed once per clip (or per row of a batch)"""
+    return dsp.stft_magnitude(audio, N_FFT, HOP_LENGTH)
+
+
+def frame_counts(lengths):
+    """Number of centred STFT frames librosa produces for each clip length"""
+    return 1 + np.asarray(lengths) // HOP_LENGTH
+
+
+# Masked statistics
+# Batches are zero-padded to a common length. Because librosa's centred STFT
+# pads with zeros too, the first frame_counts(n) frames of a padded clip are
+# identical to those of the unpadded clip; the remaining frames are masked out.
+def _masked_mean(values, mask, counts):
+    return np.sum(np.where(mask, values, 0), axis=-1) / counts
+
+
+def _masked_std(values, mask, counts):
+    mean = _masked_mean(values, mask, counts)
+    deviation = np.where(mask, values - mean[..., None], 0)
+    return np.sqrt(np.sum(deviation ** 2, axis=-1) / counts)
+
+
+def _power_to_db(S, mask, amin=1e-10, top_db=80.0):
+    """librosa.power_to_db with the top_db floor taken per clip over valid frames"""
+    log_spec = 10.0 * np.log10(np.maximum(amin, S))
+    peak = np.max(np.where(mask, log_spec, -np.inf), axis=(-2, -1), keepdims=True)
+    return np.maximum(log_spec, peak - top_db)
+
+
+# Feature families
+def time_domain_features(audio, lengths):
+    """Mean absolute amplitude, standard deviation, peak and zero crossing rate"""
+    counts = np.asarray(lengths)
+    sample_mask = np.arange(audio.shape[-1]) < counts[:, None]
+
+    mean_abs = _masked_mean(np.abs(audio), sample_mask, counts)
+    std = _masked_std(audio, sample_mask, counts)
+    peak = np.max(np.abs(audio), axis=-1)
+
+    # Only count sign changes between two real samples, not into the padding
+    rising = (np.diff(np.sign(audio), axis=-1) > 0) & sample_mask[:, 1:]
+    zcr = np.sum(rising, axis=-1) / counts
+
+    return np.stack([mean_abs, std, peak, zcr], axis=-1)
+
+
+def mfcc(power, sr, mask):
+    """MFCCs from a power spectrogram"""
+    mel = np.einsum("...ft,mf->...mt", power, mel_filterbank(sr, N_FFT), optimize=True)
+    log_mel = _power_to_db(mel, mask)
+    return np.einsum("cm,...mt->...ct", dsp.dct_matrix(log_mel.shape[-2], N_MFCC), log_mel, optimize=True)
+
+
+def spectral_shape(magnitude, sr):
+    """Spectral centroid, bandwidth and 85% rolloff from one magnitude spectrogram"""
+    freq = fft_frequencies(sr, N_FFT)
+
+    # Column-normalise as librosa.util.normalize(norm=1) does, leaving silent frames at zero
+    total = np.sum(magnitude, axis=-2, keepdims=True)
+    weights = magnitude / np.where(total < np.finfo(magnitude.dtype).tiny, 1, total)
+    centroid = np.sum(freq * weights, axis=-2, keepdims=True)
+    bandwidth = np.sum(weights * np.abs(freq - centroid) ** 2, axis=-2, keepdims=True) ** 0.5
+
+    # freq is increasing, so the rolloff is the first bin reaching the threshold
+    total_energy = np.cumsum(magnitude, axis=-2)
+    threshold = 0.85 * total_energy[..., -1:, :]
+    rolloff = freq[np.argmax(total_energy >= threshold, axis=-2), 0]
+
+    return centroid[..., 0, :], bandwidth[..., 0, :], rolloff
+
+
+def chroma(power, sr, n_frames):
+    """Chromagram from a power spectrogram, with per-clip tuning estimation"""
+    bases = []
+    for clip_power, n in zip(power, n_frames):
+        tuning = dsp.estimate_tuning(clip_power[:, :n], sr, N_FFT)
+        bases.append(chroma_filterbank(sr, N_FFT, float(tuning)))
+    raw_chroma = np.einsum("bcf,bft->bct", np.stack(bases), power, optimize=True)
+    return dsp.normalize(raw_chroma, axis=-2)
+
+
+def contrast_peaks_valleys(magnitude, sr):
+    """Per-band peak and valley energy of every frame, before conversion to dB"""
+    bands = contrast_bands(sr, N_FFT)
+
+    shape = list(magnitude.shape)
+    shape[-2] = len(bands)
+    valley = np.zeros(shape)
+    peak = np.zeros_like(valley)
+
+    for k, (rows, n_quantile) in enumerate(bands):
+        sortedr = np.sort(magnitude[..., rows, :], axis=-2)
+        valley[..., k, :] = np.mean(sortedr[..., :n_quantile, :], axis=-2)
+        peak[..., k, :] = np.mean(sortedr[..., -n_quantile:, :], axis=-2)
+
+    return peak, valley
+
+
+def spectral_contrast(magnitude, sr, mask):
+    """Spectral contrast from a magnitude spectrogram"""
+    peak, valley = contrast_peaks_valleys(magnitude, sr)
+    return _power_to_db(peak, mask) - _power_to_db(valley, mask)
+
+
+def batch_features(audio, lengths, sr, families=None):
+    """Compute feature vectors for a zero-padded batch of clips sharing one sample rate
+
+    audio is a 2-D array (n_clips, n_samples); lengths holds each clip's true length.
+    With `families`, only those families are computed (the spectrogram is skipped
+    when only time_domain is asked for); each value equals the same column of the
+    full vector.
+    """
+    families = canonical_families(families) or FAMILY_NAMES
+
+    # Apply preprocessing (normalize audio)
+    audio = dsp.normalize(audio, axis=-1)
+    columns = []
+
+    if 'time_domain' in families:
+        with stage('features.time_domain'):
+            columns.append(time_domain_features(audio, lengths))
+    if families == ('time_domain',):
+        return np.concatenate(columns, axis=-1).astype(np.float64)
+
+    with stage('features.stft'):
+        magnitude = spectrogram(audio)
+        power = magnitude ** 2
+
+    n_frames = np.minimum(frame_counts(lengths), magnitude.shape[-1])
+    frame_mask = (np.arange(magnitude.shape[-1]) < n_frames[:, None])[:, None, :]
+    counts = n_frames[:, None]
+
+    if 'mfcc' in families:
+        with stage('features.mfcc'):
+            mfccs = mfcc(power, sr, frame_mask)
+            columns.append(_masked_mean(mfccs, frame_mask, counts))
+            columns.append(_masked_std(mfccs, frame_mask, counts))
+
+    if 'spectral_shape' in families:
+        with stage('features.spectral_shape'):
+            for values in spectral_shape(magnitude, sr):
+                values = values[:, None, :]
+                columns.append(_masked_mean(values, frame_mask, counts))
+                columns.append(_masked_std(values, frame_mask, counts))
+
+    if 'chroma' in families:
+        with stage('features.chroma'):
+            columns.append(_masked_mean(chroma(power, sr, n_frames), frame_mask, counts))
+    if 'contrast' in families:
+        with stage('features.contrast'):
+            columns.append(_masked_mean(spectral_contrast(magnitude, sr, frame_mask), frame_mask, counts))
+
+    return np.concatenate(columns, axis=-1).astype(np.float64)
+
+
+def clip_features(audio, sr, families=None):
+    """Compute the feature vector of one clip from a single shared spectrogram"""
+    return batch_features(audio[np.newaxis, :], [len(audio)], sr, families)[0]
@@ -1,22 +1,141 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.pipeline import Pipeline
-from sklearn.decomposition import PCA
-import os
 import warnings
 warnings.filterwarnings('ignore')
 
+import hashlib
+import json
+
+from svm_ import feature_engine
+from svm_.audio_io import load_audio, resample
+from svm_.feature_engine import batch_features, canonical_families, clip_features, family_columns
+
+# Bump whenever the definition of the feature vector changes
+# 2: feature engine computes with svm_.dsp instead of librosa
+# 3: audio is resampled to the analysis rate when decoded
+FEATURE_VERSION = 3
+
+
+def feature_config(families=None):
+    """The definition of the feature vector; models are checked against it when they load"""
+    config = {
+        'version': FEATURE_VERSION,
+        'n_fft': feature_engine.N_FFT,
+        'hop_length': feature_engine.HOP_LENGTH,
+        'n_mfcc': feature_engine.N_MFCC,
+        'analysis_sr': feature_engine.ANALYSIS_SR,
+    }
+    # Only a subset changes the config, so full-vector fingerprints stay as they were
+    families = canonical_families(families)
+    if families is not None:
+        config['families'] = list(families)
+    return config
+
+
+def feature_fingerprint(families=None):
+    """Short stable hash of feature_config()"""
+    config = json.dumps(feature_config(families), sort_keys=True)
+    return hashlib.sha1(config.encode()).hexdigest()[:16]
+
+
+def cache_fingerprint():
+    """feature_fingerprint() plus the library versions, which can change the last
+    bits of a vector; names FeatureCache directories, never checked against models"""
+    config = json.dumps(dict(feature_config(), numpy=np.__version__), sort_keys=True)
+    return hashlib.sha1(config.encode()).hexdigest()[:16]
+
+
+def load_clip(source):
+    """Decode a source (path, bytes or file-like) at the analysis rate - the decode
+    step shared by training and serving"""
+    return load_audio(source, feature_engine.ANALYSIS_SR)
+
+
+def to_analysis_rate(audio, sr):
+    """An already decoded waveform, resampled to the analysis rate if needed"""
+    if feature_engine.ANALYSIS_SR is None or sr == feature_engine.ANALYSIS_SR:
+        return audio, sr
+    return resample(audio, sr, feature_engine.ANALYSIS_SR), feature_engine.ANALYSIS_SR
+
+
+def model_families(model):
+    """Feature families a model was trained on (None: the full vector)"""
+    return canonical_families(getattr(model, 'feature_families', None))
+
+
+def select_families(features, families):
+    """Columns of full feature vectors (a 2-D array) belonging to the given families"""
+    if canonical_families(families) is None:
+        return features
+    return np.asarray(features)[:, family_columns(families)]
+
 
 # 2. Feature Extraction
-def extract_features(audio_data):
-    """Extract audio features from a list of audio files"""
+def extract_features(audio_data, cache=None, families=None):
+    """Extract audio features from a list of audio files.
+    families: only compute these feature families (see feature_engine.FAMILIES).
+    If a FeatureCache is given, vectors are looked up by waveform content first;
+    it holds full vectors, from which the families are then selected."""
+    features = []
+    compute_families = families if cache is None else None
+    
+    for audio, sr in audio_data:
+        key = cache.waveform_key(audio, sr) if cache is not None else None
+        feature_vector = cache.get(key) if cache is not None else None
+        if feature_vector is None:
+            feature_vector = clip_features(audio, sr, compute_families)
+            if cache is not None:
+                cache.put(key, feature_vector)
+        features.append(feature_vector)
+    
+    features = np.array(features)
+    return features if cache is None else select_families(features, families)
+
+
+def extract_features_batch(audio_data, bucket_seconds=0.5, max_batch_size=8, cache=None, families=None):
+    """Extract audio features for many clips at once.
+
+    Clips are grouped by sample rate and length bucket (bucket_seconds wide),
+    zero-padded into 2-D batches of at most max_batch_size clips and featurised
+    with one set of array operations per batch. Padding is masked out of every
+    statistic, so each row matches extract_features for the same clip.
+    If a FeatureCache is given, only clips missing from it are featurised.
+    families: as in extract_features.
+    """
+    rows = [None] * len(audio_data)
+    keys = [None] * len(audio_data)
+    buckets = {}
+    compute_families = families if cache is None else None
+    for i, (audio, sr) in enumerate(audio_data):
+        if cache is not None:
+            keys[i] = cache.waveform_key(audio, sr)
+            rows[i] = cache.get(keys[i])
+            if rows[i] is not None:
+                continue
+        key = (sr, int(np.ceil(len(audio) / (bucket_seconds * sr))))
+        buckets.setdefault(key, []).append(i)
+    
+    for (sr, _), indices in buckets.items():
+        for start in range(0, len(indices), max_batch_size):
+            chunk = indices[start:start + max_batch_size]
+            lengths = [len(audio_data[i][0]) for i in chunk]
+            batch = np.zeros((len(chunk), max(lengths)), dtype=np.float32)
+            for row, i in enumerate(chunk):
+                batch[row, :lengths[row]] = audio_data[i][0]
+            
+            for i, feature_vector in zip(chunk, batch_features(batch, lengths, sr, compute_families)):
+                rows[i] = feature_vector
+                if cache is not None:
+                    cache.put(keys[i], feature_vector)
+    
+    rows = np.array(rows)
+    return rows if cache is None else select_families(rows, families)
+
+
+def extract_features_reference(audio_data):
+    """Reference implementation: one librosa call (and STFT) per feature family.
+    Kept to check that the shared-spectrogram engine stays numerically equivalent."""
+    import librosa
+    
     features = []
     
     for audio, sr in audio_data:
@@ -0,0 +1,154 @@
+'''
+Feature family profiler: extraction cost and ablation of every family, and
+selection of the most accurate family subset within a per-clip latency budget.
+
+    python -m svm_.feature_profile dataset/equipment_sound_dataset --budget-ms 5
+
+Costs are measured per clip on the serving path (extract_features, one clip
+at a time) from the instrumentation stages of feature_engine.batch_features.
+Accuracy is the cross-validated weighted F1 of the scaler -> PCA -> SVC
+pipeline on the family's columns of the full feature vectors.
+'''
+import argparse
+import itertools
+import os
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+from svm_ import instrumentation
+from svm_.dataset_extraction import list_audio_files
+from svm_.feature_engine import FAMILIES, FAMILY_NAMES
+from svm_.feature_extraction import extract_features, load_clip, select_families
+from svm_.svm_model import make_pipeline
+
+# Families computed from the shared spectrogram, which they pay for once between them
+SPECTRAL_FAMILIES = tuple(name for name in FAMILY_NAMES if name != 'time_domain')
+
+
+def sample_clips(data_dir, n_clips=32, seed=0):
+    """Decode a random sample of the dataset's clips for cost profiling"""
+    files = list_audio_files(data_dir)
+    rng = np.random.default_rng(seed)
+    audio_data = []
+    for i in rng.permutation(len(files)):
+        if len(audio_data) == n_clips:
+            break
+        try:
+            audio_data.append(load_clip(files[i][0]))
+        except Exception as e:
+            print(f"Error loading {files[i][0]}: {e}")
+    return audio_data
+
+
+def family_costs(audio_data, repeat=3):
+    """
+    Median seconds per clip of the shared STFT ('stft') and of each feature
+    family, extracting the full vector one clip at a time as the server does.
+    """
+    was_enabled = instrumentation.ENABLED
+    extract_features(audio_data[:1])  # Build the analysis tables first
+    runs = []
+    try:
+        for _ in range(repeat):
+            _, timings, _ = instrumentation.call_timed(extract_features, audio_data)
+            runs.append(timings)
+    finally:
+        instrumentation.enable(was_enabled)
+
+    costs = {}
+    for name in ('stft',) + FAMILY_NAMES:
+        costs[name] = float(np.median([run.get(f'features.{name}', 0.0) for run in runs])) / len(audio_data)
+    return costs
+
+
+def subset_cost(costs, families):
+    """Seconds per clip to extract only `families`"""
+    seconds = sum(costs[name] for name in families)
+    if any(name in SPECTRAL_FAMILIES for name in families):
+        seconds += costs['stft']
+    return seconds
+
+
+def score_families(X, y, families, params=None, cv=5):
+    """Mean cross-validated weighted F1 of the pipeline on the families' columns of X"""
+    model = make_pipeline(probability=False).set_params(**(params or {}))
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+    scores = cross_val_score(model, select_families(X, families), y, cv=folds, scoring='f1_weighted', n_jobs=-1)
+    return float(np.mean(scores))
+
+
+def ablation(X, y, params=None, cv=5):
+    """Scores of the full vector, of the vector without each family, and of each family alone"""
+    results = {'all': score_families(X, y, FAMILY_NAMES, params, cv)}
+    for name in FAMILY_NAMES:
+        results[f'without {name}'] = score_families(X, y, [f for f in FAMILY_NAMES if f != name], params, cv)
+        results[f'only {name}'] = score_families(X, y, [name], params, cv)
+    return results
+
+
+def budgeted_families(X, y, costs, budget_ms, params=None, cv=5, tolerance=0.0):
+    """
+    Most accurate family subset whose extraction fits budget_ms per clip.
+    Every subset within the budget is cross-validated; of those scoring within
+    `tolerance` of the best, the cheapest wins. Returns (families, score,
+    seconds per clip, [(families, score, seconds), ...] for every subset tried).
+    Raises ValueError if no subset fits the budget.
+    """
+    candidates = []
+    for size in range(1, len(FAMILY_NAMES) + 1):
+        for families in itertools.combinations(FAMILY_NAMES, size):
+            seconds = subset_cost(costs, families)
+            if 1000 * seconds <= budget_ms:
+                candidates.append((families, seconds))
+    if not candidates:
+        cheapest = min(subset_cost(costs, (name,)) for name in FAMILY_NAMES)
+        raise ValueError(f"No feature family fits {budget_ms} ms per clip (cheapest: {1000 * cheapest:.2f} ms)")
+
+    tried = [(families, score_families(X, y, families, params, cv), seconds) for families, seconds in candidates]
+    best_score = max(score for _, score, _ in tried)
+    families, score, seconds = min(
+        (entry for entry in tried if entry[1] >= best_score - tolerance),
+        key=lambda entry: (entry[2], -entry[1])
+    )
+    return families, score, seconds, tried
+
+
+def print_profile(costs, scores):
+    """Per-family cost and ablation table"""
+    sizes = dict(FAMILIES)
+    print(f"{'family':>16} {'values':>7} {'ms/clip':>9} {'F1 without':>11} {'F1 alone':>9}")
+    print(f"{'stft (shared)':>16} {'':>7} {1000 * costs['stft']:9.3f}")
+    for name in FAMILY_NAMES:
+        print(f"{name:>16} {sizes[name]:7d} {1000 * costs[name]:9.3f} "
+              f"{scores[f'without {name}']:11.4f} {scores[f'only {name}']:9.4f}")
+    print(f"{'all':>16} {sum(sizes.values()):7d} {1000 * subset_cost(costs, FAMILY_NAMES):9.3f} "
+          f"{scores['all']:11.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile feature family cost and accuracy contribution.")
+    parser.add_argument('data_dir', help="Dataset directory with one sub-directory per class")
+    parser.add_argument('--budget-ms', type=float, help="Also select the best family subset within this budget")
+    parser.add_argument('--tolerance', type=float, default=0.0, help="F1 a cheaper subset may lose")
+    parser.add_argument('--clips', type=int, default=32, help="Clips timed for the cost profile")
+    parser.add_argument('--cache-dir', help="FeatureCache directory for the full vectors")
+    args = parser.parse_args(argv)
+
+    from svm_.dataset_extraction import load_features_parallel
+    from svm_.feature_cache import FeatureCache
+
+    costs = family_costs(sample_clips(args.data_dir, args.clips))
+    cache_dir = args.cache_dir or os.path.join(args.data_dir, os.pardir, "feature_cache")
+    with FeatureCache(cache_dir) as cache:
+        X, y = load_features_parallel(args.data_dir, cache=cache)
+    print_profile(costs, ablation(X, y))
+
+    if args.budget_ms is not None:
+        families, score, seconds, _ = budgeted_families(X, y, costs, args.budget_ms, tolerance=args.tolerance)
+        print(f"\nWithin {args.budget_ms} ms/clip: {', '.join(families)} "
+              f"({1000 * seconds:.3f} ms/clip, F1 {score:.4f})")
+
+
+if __name__ == "__main__":
+    main()
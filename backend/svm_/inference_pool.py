@@ -0,0 +1,107 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from svm_ import instrumentation
+from svm_.instrumentation import stage
+from svm_.feature_extraction import extract_features, load_clip
+from svm_.classification import featurise_sources
+
+
+class QueueFull(Exception):
+    """Raised when the inference pool already has its maximum number of jobs in flight"""
+
+
+class InferencePool:
+    """
+    Bounded worker pool that keeps CPU-bound inference off the asyncio event loop.
+
+    At most `workers` jobs run at once and at most `queue_depth` more wait for a
+    worker; any further submission fails immediately with QueueFull so the
+    server can shed load instead of letting latency grow without bound.
+
+    kind='process' runs jobs in worker processes (no GIL contention);
+    kind='thread' runs them in threads of the server process.
+    """
+
+    def __init__(self, workers=None, queue_depth=32, kind='process'):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.kind = kind
+
+        if kind == 'process':
+            # spawn: never fork a process that is already running server threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        elif kind == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference')
+        else:
+            raise ValueError(f"Unknown inference pool kind: {kind!r}")
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._busy_seconds = 0.0
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result; raise QueueFull if saturated"""
+        if self.in_flight >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise QueueFull(f"{self.in_flight} inference jobs already in flight")
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            if instrumentation.ENABLED:
+                # Workers time their own stages and send them back with the result
+                result, timings, job_seconds = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, instrumentation.call_timed, fn, *args)
+                instrumentation.merge(timings)
+                instrumentation.observe('pool.wait', time.perf_counter() - start - job_seconds)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._busy_seconds += time.perf_counter() - start
+        self.completed += 1
+        return result
+
+    def stats(self):
+        """Worker and queue statistics"""
+        finished = self.completed + self.failed
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': self.in_flight,
+            'queued': max(0, self.in_flight - self.workers),
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'mean_latency_ms': 1000 * self._busy_seconds / finished if finished else None,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Job functions run inside the pool. Feature extraction is the expensive part
+# of a request; prediction is batched separately (see svm_.micro_batch).
+# `families` are the feature families the serving model was trained on.
+def extract_file_features_job(audio_file, families=None):
+    """audio_file: a path or the raw bytes of an upload, decoded in the worker"""
+    with stage('decode'):
+        clip = load_clip(audio_file)
+    return extract_features([clip], families=families)[0]
+
+
+def featurise_sources_job(sources, families=None):
+    return featurise_sources(sources, families=families)
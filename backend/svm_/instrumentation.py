@@ -0,0 +1,179 @@
+'''
+Opt-in per-stage timing, exported as Prometheus histograms and counters.
+
+Disabled unless INSTRUMENTATION=1 (or enable() is called): stage() then
+returns a shared no-op context manager, so instrumented code pays one
+function call per stage.
+
+    with stage('decode'):
+        audio, sr = load_audio(data)
+
+When enabled, each stage's duration is observed in the stage histogram and,
+if a request is being timed (start_request), added to that request's
+breakdown, which the server returns in a Server-Timing header. Work shipped
+to another process or thread runs under call_timed, which collects the
+stages there and returns them to be merged into the caller's request.
+'''
+import contextvars
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
+
+# Seconds; Prometheus histogram upper bounds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_timings = contextvars.ContextVar('timings', default=None)
+_lock = threading.Lock()
+_histograms = {}  # (metric, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}  # (metric, labels) -> value
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+class Timings(dict):
+    """Stage name -> seconds for one request (or one job); `export` timings are
+    also observed in the process's histograms"""
+
+    def __init__(self, export=True):
+        super().__init__()
+        self.export = export
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """Context manager timing one stage (a no-op while disabled)"""
+    return _Stage(name) if ENABLED else _NO_STAGE
+
+
+def observe(name, seconds):
+    """Record a stage duration for the current request and/or the stage histogram"""
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+        if not timings.export:
+            return
+    observe_histogram('aimechanics_stage_seconds', (('stage', name),), seconds)
+
+
+def start_request():
+    """Time the stages of the current context (e.g. one HTTP request); returns its Timings"""
+    timings = Timings()
+    _timings.set(timings)
+    return timings
+
+
+def call_timed(fn, *args):
+    """Run fn(*args) collecting its stages; returns (result, {stage: seconds}, total seconds).
+    Used for jobs running in worker threads or processes, which do not share the caller's context."""
+    enable()
+    context = contextvars.copy_context()
+    timings = Timings(export=False)
+    start = time.perf_counter()
+    result = context.run(_run_with, timings, fn, args)
+    return result, dict(timings), time.perf_counter() - start
+
+
+def _run_with(timings, fn, args):
+    _timings.set(timings)
+    return fn(*args)
+
+
+def merge(timings):
+    """Merge stage timings returned by call_timed into the current request and histograms"""
+    for name, seconds in timings.items():
+        observe(name, seconds)
+
+
+def server_timing(timings):
+    """Server-Timing header value for a request's stage breakdown (durations in ms)"""
+    return ", ".join(f"{name.replace('.', '-')};dur={1000 * seconds:.3f}" for name, seconds in timings.items())
+
+
+# Metrics registry
+def observe_histogram(metric, labels, value):
+    with _lock:
+        counts = _histograms.setdefault((metric, labels), [0] * (len(BUCKETS) + 1) + [0.0])
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                counts[i] += 1
+        counts[len(BUCKETS)] += 1
+        counts[-1] += value
+
+
+def increment(metric, labels=(), amount=1):
+    with _lock:
+        _counters[(metric, labels)] = _counters.get((metric, labels), 0) + amount
+
+
+def _labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def render_prometheus(gauges=None, totals=None):
+    """All histograms and counters (plus optional {name: value} gauges, and
+    {name: value} totals - counts kept elsewhere, exported as counters) in the
+    Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        histograms = {key: list(value) for key, value in _histograms.items()}
+        counters = dict(_counters)
+
+    for metric in sorted({metric for metric, _ in histograms}):
+        lines.append(f"# TYPE {metric} histogram")
+        for (name, labels), counts in sorted(histograms.items()):
+            if name != metric:
+                continue
+            for bound, count in zip(BUCKETS, counts):
+                lines.append(f"{metric}_bucket{_labels(labels, (('le', repr(bound)),))} {count}")
+            lines.append(f"{metric}_bucket{_labels(labels, (('le', '+Inf'),))} {counts[len(BUCKETS)]}")
+            lines.append(f"{metric}_sum{_labels(labels)} {counts[-1]}")
+            lines.append(f"{metric}_count{_labels(labels)} {counts[len(BUCKETS)]}")
+
+    for metric in sorted({metric for metric, _ in counters}):
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{metric}{_labels(labels)} {value}")
+
+    for metric, value in sorted((totals or {}).items()):
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+
+    for metric, value in sorted((gauges or {}).items()):
+        if value is not None:
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
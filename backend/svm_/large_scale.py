@@ -0,0 +1,168 @@
+'''
+Out-of-core trainer for datasets too large for an exact SVC.
+
+An RBF kernel approximation (Nystroem landmarks or random Fourier features)
+followed by a logistic-loss SGDClassifier trained with partial_fit, so
+training time grows linearly with the number of clips and only one chunk
+of feature vectors is in memory at a time. Probabilities are calibrated on
+rows held out from the stream. The result is a plain scikit-learn estimator
+that works with classify_audio like svm_model.joblib; main also exports it as
+a fingerprinted model artifact (large_scale_model.bin next to the joblib file)
+that the runtime and the server load like svm_model.bin.
+
+    python -m svm_.large_scale dataset/equipment_sound_dataset models/large_scale_model.joblib
+'''
+import argparse
+import os
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.frozen import FrozenEstimator
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from svm_.dataset_extraction import CLASSES, iter_file_features, list_audio_files
+
+
+def array_chunks(X, y, chunk_size=1024, seed=0):
+    """Chunk factory over in-memory arrays: every call yields the rows in the same shuffled order"""
+    order = np.random.default_rng(seed).permutation(len(y))
+
+    def chunks():
+        for start in range(0, len(order), chunk_size):
+            index = order[start:start + chunk_size]
+            yield X[index], y[index]
+    return chunks
+
+
+def feature_chunks(data_dir, chunk_size=1024, cache=None, seed=0):
+    """
+    Chunk factory over a dataset directory: every call decodes and featurises
+    the files again, in the same shuffled order (list_audio_files is sorted by
+    class, which partial_fit must not see). Pass a FeatureCache so passes after
+    the first are served from it.
+    """
+    files = list_audio_files(data_dir)
+    order = np.random.default_rng(seed).permutation(len(files))
+
+    def chunks():
+        features, labels = [], []
+        for _, label, feature_vector in iter_file_features([files[i] for i in order], cache=cache):
+            features.append(feature_vector)
+            labels.append(label)
+            if len(labels) == chunk_size:
+                yield np.array(features), np.array(labels)
+                features, labels = [], []
+        if labels:
+            yield np.array(features), np.array(labels)
+        if cache is not None:
+            cache.flush()
+    return chunks
+
+
+def train_large_scale(chunks, classes=tuple(CLASSES.values()), approximation='nystroem', n_components=500,
+                      gamma=None, alpha=1e-4, epochs=5, calibration_every=10, max_calibration_rows=20000, seed=0):
+    """
+    Train on a chunk factory (a callable returning a fresh iterator of (X, y) chunks).
+
+    Pass 1 fits the StandardScaler with partial_fit and keeps a reservoir sample
+    of n_components rows as Nystroem landmarks (RBFSampler needs none). Then
+    `epochs` passes train the SGDClassifier with partial_fit on the mapped chunks.
+    Every calibration_every-th row is held out of training and used to fit
+    sigmoid calibration of the probabilities. gamma defaults to 1 / n_features,
+    SVC's gamma='scale' on standardised features.
+    """
+    rng = np.random.default_rng(seed)
+    classes = np.asarray(classes)
+
+    # 1. Scaler statistics and a reservoir sample of rows
+    scaler = StandardScaler()
+    reservoir, seen = [], 0
+    for X, _ in chunks():
+        scaler.partial_fit(X)
+        for row in X:
+            if len(reservoir) < n_components:
+                reservoir.append(row)
+            else:
+                j = rng.integers(seen + 1)
+                if j < n_components:
+                    reservoir[j] = row
+            seen += 1
+    if seen == 0:
+        raise ValueError("No training data")
+
+    n_features = scaler.n_features_in_
+    gamma = 1.0 / n_features if gamma is None else gamma
+    if approximation == 'nystroem':
+        kernel_map = Nystroem(gamma=gamma, n_components=min(n_components, seen), random_state=seed)
+        kernel_map.fit(scaler.transform(np.array(reservoir)))
+    elif approximation == 'rff':
+        kernel_map = RBFSampler(gamma=gamma, n_components=n_components, random_state=seed)
+        kernel_map.fit(np.zeros((1, n_features)))
+    else:
+        raise ValueError(f"Unknown kernel approximation: {approximation!r}")
+
+    # 2. SGD epochs over the stream, holding out calibration rows
+    sgd = SGDClassifier(loss='log_loss', alpha=alpha, random_state=seed)
+    calibration_X, calibration_y, calibration_rows = [], [], 0
+    for epoch in range(epochs):
+        position = 0
+        for X, y in chunks():
+            held_out = (position + np.arange(len(y))) % calibration_every == 0
+            position += len(y)
+            if epoch == 0 and calibration_rows < max_calibration_rows:
+                calibration_X.append(X[held_out])
+                calibration_y.append(y[held_out])
+                calibration_rows += int(held_out.sum())
+            if not held_out.all():
+                sgd.partial_fit(kernel_map.transform(scaler.transform(X[~held_out])), y[~held_out], classes=classes)
+
+    model = Pipeline([('scaler', scaler), ('kernel', kernel_map), ('sgd', sgd)])
+
+    # 3. Sigmoid calibration of the frozen model on the held-out rows
+    calibration_X = np.concatenate(calibration_X)[:max_calibration_rows]
+    calibration_y = np.concatenate(calibration_y)[:max_calibration_rows]
+    present, counts = np.unique(calibration_y, return_counts=True)
+    if len(present) < len(classes) or counts.min() < 2:
+        print("Too few held-out rows to calibrate; serving uncalibrated log-loss probabilities")
+        return model
+    calibrated = CalibratedClassifierCV(FrozenEstimator(model), method='sigmoid', cv=min(5, int(counts.min())))
+    return calibrated.fit(calibration_X, calibration_y)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the large-scale kernel-approximation classifier.")
+    parser.add_argument('data_dir', help="Dataset directory with one sub-directory per class")
+    parser.add_argument('output_path')
+    parser.add_argument('--approximation', choices=['nystroem', 'rff'], default='nystroem')
+    parser.add_argument('--components', type=int, default=500)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    parser.add_argument('--cache-dir', help="FeatureCache directory (default: a feature_cache next to output_path)")
+    args = parser.parse_args(argv)
+
+    from joblib import dump
+    from svm_.compiled_model import compile_pipeline
+    from svm_.feature_cache import FeatureCache
+    from svm_.feature_extraction import feature_fingerprint
+    from svm_.model_artifact import save_artifact
+
+    cache_dir = args.cache_dir or os.path.join(os.path.dirname(os.path.abspath(args.output_path)), "feature_cache")
+    with FeatureCache(cache_dir) as cache:
+        model = train_large_scale(feature_chunks(args.data_dir, args.chunk_size, cache),
+                                  approximation=args.approximation, n_components=args.components,
+                                  epochs=args.epochs)
+    model.feature_fingerprint = feature_fingerprint()
+    dump(model, args.output_path)
+    print(f"Large-scale model saved to {args.output_path}")
+
+    artifact_path = os.path.splitext(args.output_path)[0] + '.bin'
+    header = save_artifact(compile_pipeline(model), artifact_path)
+    print(f"Model artifact {header['model_version']} (features {header['feature_fingerprint']}) "
+          f"saved to {artifact_path}")
+
+
+if __name__ == "__main__":
+    main()
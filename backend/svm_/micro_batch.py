@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Collects feature vectors from concurrent requests and classifies them together.
+
+    The first vector to arrive opens a batch; the batch is flushed when it reaches
+    max_batch_size or max_wait_ms after it opened, whichever comes first. One
+    predict_batch(features_2d) call then serves every waiting request, so the
+    fixed per-call cost of the sklearn pipeline is paid once per batch instead
+    of once per request. predict_batch is a blocking function returning one
+    result per row; it runs in a thread, off the event loop.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=5.0):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self.batches = 0
+        self.items = 0
+        self._busy_seconds = 0.0
+        self._pending = []  # (feature_vector, future)
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, feature_vector):
+        """Queue one feature vector and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((feature_vector, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': 1000 * self.max_wait,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else None,
+            'mean_batch_ms': 1000 * self._busy_seconds / self.batches if self.batches else None,
+        }
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        features = np.vstack([feature_vector for feature_vector, _ in batch])
+        start = time.perf_counter()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(None, self.predict_batch, features)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._busy_seconds += time.perf_counter() - start
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,155 @@
+'''
+Versioned, memory-mappable model artifact for the compiled models: the SVC
+pipeline (CompiledSVM) and the large-scale kernel-approximation model
+(CompiledKernelApproximation).
+
+One flat file: an 8-byte magic, a little-endian uint32 header length, a JSON
+header (format version, model type, feature fingerprint, families, analysis
+rate and config, kernel parameters, classes, and the offset/dtype/shape of
+every array), then the arrays, each starting on a 64-byte boundary. Loading maps
+the arrays read-only straight from the file, so every server worker shares
+one physical copy of the weights through the page cache, and nothing is
+unpickled.
+
+    python -m svm_.model_artifact models/svm_model.joblib models/svm_model.bin
+    python -m svm_.model_artifact models/large_scale_model.joblib models/large_scale_model.bin
+'''
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from svm_ import feature_engine
+from svm_.compiled_model import CompiledKernelApproximation, CompiledSVM, compile_pipeline
+from svm_.feature_extraction import feature_config, feature_fingerprint, model_families
+
+MAGIC = b'SVMART\x00\x00'
+FORMAT_VERSION = 2
+# Version 1 files hold a CompiledSVM and have no model_type
+READABLE_VERSIONS = (1, 2)
+ALIGNMENT = 64
+
+# Compiled model classes by header model_type; each lists its ARRAYS and PARAMS
+MODEL_TYPES = {cls.MODEL_TYPE: cls for cls in (CompiledSVM, CompiledKernelApproximation)}
+
+
+class ArtifactMismatch(ValueError):
+    """The artifact was written by an incompatible format or feature pipeline"""
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_artifact(compiled, path):
+    """Write a compiled model to `path` (atomically); returns the header"""
+    arrays = {name: np.ascontiguousarray(getattr(compiled, name), dtype='<f8') for name in compiled.ARRAYS}
+    digest = hashlib.blake2b(digest_size=8)
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+        digest.update(array.tobytes())
+
+    families = model_families(compiled)
+    if families is not None:
+        digest.update(",".join(families).encode())
+
+    classes = np.asarray(compiled.classes_)
+    header = {
+        'format_version': FORMAT_VERSION,
+        'model_type': compiled.MODEL_TYPE,
+        'model_version': digest.hexdigest(),
+        'feature_fingerprint': feature_fingerprint(families),
+        'feature_config': feature_config(families),
+        'feature_families': list(families) if families is not None else None,
+        'analysis_sr': feature_engine.ANALYSIS_SR,
+        'classes': classes.tolist(),
+        'classes_dtype': classes.dtype.str,
+        'arrays': layout,
+    }
+    header.update({name: getattr(compiled, name) for name in compiled.PARAMS})
+    header_bytes = json.dumps(header, sort_keys=True).encode()
+    # Array offsets in the header are relative to the end of the padded header
+    data_start = _aligned(len(MAGIC) + 4 + len(header_bytes))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(header_bytes)).astype('<u4').tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b'\x00' * (data_start + layout[name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    """Header of an artifact file, plus the file offset its arrays start at"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ArtifactMismatch(f"{path} is not a model artifact")
+        header_length = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+        header = json.loads(f.read(header_length))
+    return header, _aligned(len(MAGIC) + 4 + header_length)
+
+
+def load_artifact(path, check_fingerprint=True):
+    """
+    Map an artifact as its compiled model. Raises ArtifactMismatch for an unknown
+    format version or model type or, unless check_fingerprint is False, when the artifact was
+    trained on features from a different configuration than extract_features.
+    """
+    header, data_start = read_header(path)
+    if header['format_version'] not in READABLE_VERSIONS:
+        raise ArtifactMismatch(f"{path} has format version {header['format_version']}, expected {FORMAT_VERSION}")
+    model_class = MODEL_TYPES.get(header.get('model_type', CompiledSVM.MODEL_TYPE))
+    if model_class is None:
+        raise ArtifactMismatch(f"{path} holds an unknown model type {header['model_type']!r}")
+    families = header.get('feature_families')
+    if check_fingerprint and header['feature_fingerprint'] != feature_fingerprint(families):
+        raise ArtifactMismatch(
+            f"{path} was trained on features {header['feature_fingerprint']} {header['feature_config']}, "
+            f"but this build extracts {feature_fingerprint(families)} {feature_config(families)}; "
+            f"retrain or re-export the model"
+        )
+
+    # One read-only mapping of the whole file; the arrays are views into it
+    mapping = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+        arrays[name] = np.frombuffer(mapping, dtype=dtype, count=int(np.prod(shape)),
+                                     offset=data_start + spec['offset']).reshape(shape)
+
+    model = model_class(
+        classes=np.array(header['classes'], dtype=header['classes_dtype']),
+        feature_families=tuple(families) if families is not None else None,
+        **{name: header[name] for name in model_class.PARAMS},
+        **arrays,
+    )
+    model.model_version = header['model_version']
+    model.feature_fingerprint = header['feature_fingerprint']
+    model.analysis_sr = header.get('analysis_sr')
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a trained SVM pipeline or large-scale model as a model artifact.")
+    parser.add_argument('model_path', help="joblib file written by train_.main or svm_.large_scale")
+    parser.add_argument('output_path')
+    args = parser.parse_args(argv)
+
+    from joblib import load
+
+    header = save_artifact(compile_pipeline(load(args.model_path)), args.output_path)
+    print(f"Model artifact {header['model_version']} (features {header['feature_fingerprint']}) "
+          f"saved to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
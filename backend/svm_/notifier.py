@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from svm_.instrumentation import stage
+
+PARTICLE_API_URL = os.environ.get("PARTICLE_API_URL", "https://api.particle.io")
+
+
+class BulbNotifier:
+    """
+    Sends bulb colours to Particle devices from a background thread.
+
+    notify() never blocks the caller: it records the latest colour wanted for a
+    device and returns. The sender thread waits `coalesce_seconds` so a burst of
+    updates collapses into one call per device, and only calls the device when
+    the colour differs from the last one it accepted. Requests go over a pooled
+    keep-alive session with timeouts and retries with exponential backoff.
+
+    api_url can point at a local stub server in place of api.particle.io.
+    """
+
+    def __init__(self, device_id, access_token, function='setColor', api_url=PARTICLE_API_URL,
+                 timeout=(3.05, 10), retries=3, backoff_factor=0.5, coalesce_seconds=0.25):
+        self.device_id = device_id
+        self.access_token = access_token
+        self.function = function
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.coalesce_seconds = coalesce_seconds
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['POST']),
+            raise_on_status=False,
+        )
+        self.session.mount('http://', HTTPAdapter(max_retries=retry, pool_maxsize=4))
+        self.session.mount('https://', HTTPAdapter(max_retries=retry, pool_maxsize=4))
+
+        self.sent = 0
+        self.skipped = 0
+        self.failed = 0
+
+        self._pending = {}  # device_id -> latest requested colour
+        self._last_sent = {}  # device_id -> colour the device last accepted
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def notify(self, color, device_id=None):
+        """Queue `color` for the device (default: the notifier's device) and return immediately"""
+        if color is None:
+            return
+        device_id = device_id or self.device_id
+
+        with self._condition:
+            if device_id not in self._pending and self._last_sent.get(device_id) == color:
+                self.skipped += 1
+                return
+            self._pending[device_id] = color
+            self._start()
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'sent': self.sent,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'pending': len(self._pending),
+                'last_sent': dict(self._last_sent),
+            }
+
+    def close(self, timeout=5):
+        """Stop the sender thread after it flushes pending updates"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.session.close()
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='bulb-notifier', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending and self._closed:
+                    return
+
+            # Let a burst of updates settle before sending
+            if not self._closed:
+                time.sleep(self.coalesce_seconds)
+
+            with self._condition:
+                batch, self._pending = self._pending, {}
+
+            for device_id, color in batch.items():
+                if self._last_sent.get(device_id) == color:
+                    with self._condition:
+                        self.skipped += 1
+                    continue
+                ok = self._send(device_id, color)
+                with self._condition:
+                    if ok:
+                        self._last_sent[device_id] = color
+                        self.sent += 1
+                    else:
+                        self.failed += 1
+
+    def _send(self, device_id, color):
+        url = f"{self.api_url}/v1/devices/{device_id}/{self.function}"
+        try:
+            with stage('particle_call'):
+                response = self.session.post(
+                    url, data={'arg': color, 'access_token': self.access_token}, timeout=self.timeout
+                )
+        except requests.RequestException as e:
+            print("Error sending color to bulb:", e)
+            return False
+
+        if response.status_code == 200:
+            print(f"Bulb color set to: {color}")
+            return True
+        print("Failed to send color to bulb:", response.text)
+        return False
@@ -0,0 +1,76 @@
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    In-memory LRU cache of classification results, keyed by the hash of the
+    uploaded bytes and the model version, so a re-sent recording skips
+    decode, feature extraction and prediction.
+
+    Holds at most max_entries results, each for at most ttl_seconds (None
+    keeps them until evicted). max_entries=0 disables the cache. Call clear()
+    when the model is reloaded; keys carry the model version as well, so a
+    result from one model is never served for another.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._entries = OrderedDict()  # key -> (expiry time, result), least recently used first
+
+    @staticmethod
+    def key(data, model_version):
+        """Key for raw upload bytes classified by a given model"""
+        digest = hashlib.blake2b(data, digest_size=16)
+        return f"{model_version}:{digest.hexdigest()}"
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        """A copy of the cached result, or None"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry[1])
+
+    def put(self, key, result):
+        if not self.enabled:
+            return
+        expiry = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (expiry, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
@@ -0,0 +1,150 @@
+'''
+Inference-only runtime: decode -> features -> compiled model.
+
+Importing this module loads numpy, soundfile and the small svm_ inference
+modules only - no librosa, scikit-learn, scipy, pandas or matplotlib - so
+a fresh worker is ready to serve quickly. Heavy dependencies are imported
+lazily, and only on fallback paths (librosa for formats soundfile cannot
+read, scikit-learn for a pickled model file, which is only loaded with
+allow_pickle).
+
+    python -m svm_.runtime models/ clip.wav [clip2.wav ...]
+'''
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+from svm_ import model_artifact
+from svm_.classification import predict_features
+from svm_.feature_extraction import extract_features, feature_fingerprint, load_clip, model_families, to_analysis_rate
+
+CLASS_NAMES = ['normal', 'early_fault', 'failure']
+ARTIFACT_FILE = 'svm_model.bin'
+COMPILED_MODEL_FILE = 'svm_model_compiled.joblib'
+MODEL_FILE = 'svm_model.joblib'
+
+
+def resolve_model_path(path, allow_pickle=True):
+    """The model file load_model reads for `path` (a file or a models directory)"""
+    if os.path.isdir(path):
+        for name in (ARTIFACT_FILE, COMPILED_MODEL_FILE, MODEL_FILE) if allow_pickle else (ARTIFACT_FILE,):
+            if os.path.exists(os.path.join(path, name)):
+                return os.path.join(path, name)
+    return path
+
+
+def load_model(path, allow_pickle=False):
+    """
+    Load a model for inference. `path` is a model file or a directory holding
+    svm_model.bin. The .bin artifact is memory-mapped, not unpickled, and is
+    refused if it was trained on a different feature configuration.
+
+    With allow_pickle, a directory without svm_model.bin falls back to
+    svm_model_compiled.joblib or svm_model.joblib; a scikit-learn pipeline is
+    compiled on load. A pickled model is refused if its recorded
+    feature_fingerprint differs from this build's, and served with a warning
+    if it has none. Raises ValueError for a pickled model without allow_pickle.
+    """
+    path = resolve_model_path(path, allow_pickle)
+    if os.path.isdir(path):
+        raise ValueError(f"No {ARTIFACT_FILE} in {path}; export one with "
+                         f"`python -m svm_.model_artifact MODEL.joblib {ARTIFACT_FILE}`, or allow pickled models")
+    with open(path, 'rb') as f:
+        is_artifact = f.read(len(model_artifact.MAGIC)) == model_artifact.MAGIC
+    if is_artifact:
+        return model_artifact.load_artifact(path)
+    if not allow_pickle:
+        raise ValueError(f"{path} is not a model artifact; export one with "
+                         f"`python -m svm_.model_artifact {path} {ARTIFACT_FILE}`, or allow pickled models")
+
+    from joblib import load
+    from svm_.compiled_model import compile_pipeline
+
+    model = load(path)
+    expected = feature_fingerprint(model_families(model))
+    fingerprint = getattr(model, 'feature_fingerprint', None)
+    if fingerprint is None:
+        print(f"Warning: {path} records no feature fingerprint; it is served unchecked against features {expected}")
+    elif fingerprint != expected:
+        raise model_artifact.ArtifactMismatch(
+            f"{path} was trained on features {fingerprint}, but this build extracts {expected}; retrain the model")
+    print(f"Warning: serving the pickled model {path}")
+    if not hasattr(model, 'predict_with_proba'):
+        try:
+            model = compile_pipeline(model)
+        except (AttributeError, KeyError, ValueError) as e:
+            print("Serving the sklearn model; it could not be compiled:", e)
+    return model
+
+
+def model_version(model, path=None):
+    """Version of a loaded model: the artifact's own version, else a digest of its file"""
+    version = getattr(model, 'model_version', None)
+    if version is not None or path is None:
+        return version
+    digest = hashlib.blake2b(digest_size=8)
+    with open(resolve_model_path(path), 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InferenceRuntime:
+    """A loaded model plus the decode and feature steps needed to classify audio"""
+
+    def __init__(self, model, class_names=CLASS_NAMES, version=None):
+        self.model = model
+        self.class_names = class_names
+        self.model_version = version if version is not None else model_version(model)
+
+    @classmethod
+    def from_path(cls, path, class_names=CLASS_NAMES, allow_pickle=False):
+        model = load_model(path, allow_pickle)
+        return cls(model, class_names, model_version(model, path))
+
+    @property
+    def feature_families(self):
+        """Feature families the model was trained on (None: the full vector)"""
+        return model_families(self.model)
+
+    def classify_features(self, features):
+        """One result dict per row of a 2-D feature array"""
+        return predict_features(self.model, features, self.class_names)
+
+    def classify_waveform(self, audio, sr):
+        audio_data = [to_analysis_rate(audio, sr)]
+        return self.classify_features(extract_features(audio_data, families=self.feature_families))[0]
+
+    def classify_file(self, source):
+        """Classify a file path, raw file bytes or a binary file-like object"""
+        return self.classify_waveform(*load_clip(source))
+
+    def warmup(self, sr=22050, seconds=1.0):
+        """Run one synthetic clip through the whole pipeline so the first real
+        request does not pay for building the analysis tables"""
+        rng = np.random.default_rng(0)
+        audio = (0.1 * rng.standard_normal(int(sr * seconds))).astype(np.float32)
+        return self.classify_waveform(audio, sr)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    allow_pickle = argv[:1] == ['--allow-pickle']
+    if allow_pickle:
+        argv = argv[1:]
+    if len(argv) < 2:
+        print("usage: python -m svm_.runtime [--allow-pickle] MODEL_PATH AUDIO_FILE [AUDIO_FILE ...]")
+        return 2
+
+    runtime = InferenceRuntime.from_path(argv[0], allow_pickle=allow_pickle)
+    for audio_file in argv[1:]:
+        result = runtime.classify_file(audio_file)
+        probabilities = ", ".join(f"{name}={p:.4f}" for name, p in zip(runtime.class_names, result['probabilities']))
+        print(f"{audio_file}: {result['predicted_class']} ({probabilities})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
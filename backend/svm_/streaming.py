@@ -0,0 +1,286 @@
+import collections
+
+import numpy as np
+
+from svm_ import dsp
+from svm_.feature_engine import (
+    N_FFT, HOP_LENGTH, N_MFCC, mel_filterbank, chroma_filterbank, spectral_shape, contrast_peaks_valleys,
+)
+
+TOP_DB = 80.0
+DB_SCALES = ('log_mel', 'peak_db', 'valley_db')  # dB values floored at the window's max - TOP_DB
+
+
+class StreamingFeatureExtractor:
+    """
+    Incremental version of the 55-value feature vector for a continuous audio stream.
+
+    Audio is pushed in arbitrary-sized chunks. Every hop (hop_seconds, rounded to
+    whole STFT frames) only the new samples are framed and transformed, and the
+    results are kept as per-hop sums. The feature vector of the last
+    window_seconds is assembled from those sums plus the four zero-padded frames
+    at the window edges, so the cost of a hop does not depend on the window length.
+
+    Chroma tuning is estimated per window, like the batch extractor, from
+    per-frame pitch peaks kept with each hop; each hop's chroma is cached for the
+    tuning it was computed with, so in steady state only the new hop is
+    recomputed. Pass a fixed `tuning` to skip the estimation altogether.
+
+    The 80 dB top_db floor of the MFCC and contrast dB scales depends on the
+    loudest frame of the window, so each hop keeps its unfloored dB values with
+    their maximum and minimum. A hop's frame sums are cached for the floors they
+    were computed with and only recomputed when a changed floor reaches the
+    hop's quietest value.
+
+    Vectors match feature_engine.clip_features on the same window (measure the
+    difference with `python -m svm_.benchmarks stream`). Peak normalisation is
+    exact: features are computed on the raw signal and rescaled with the window
+    peak when the vector is assembled, which shifts dB values and floors alike.
+    """
+
+    def __init__(self, sr, window_seconds=5.0, hop_seconds=0.5, tuning=None):
+        self.sr = sr
+        frames_per_hop = max(1, int(round(hop_seconds * sr / HOP_LENGTH)))
+        self.hop_samples = frames_per_hop * HOP_LENGTH
+        self.n_hops = max(1, int(round(window_seconds * sr / self.hop_samples)))
+        self.window_samples = self.n_hops * self.hop_samples
+        if self.window_samples < N_FFT:
+            raise ValueError(f"The window must hold at least {N_FFT} samples")
+
+        self._fft_window = dsp.hann_window(N_FFT).astype(np.float32)
+        self._mel_basis = mel_filterbank(sr, N_FFT)
+        self._dct = dsp.dct_matrix(self._mel_basis.shape[0], N_MFCC)
+        self.tuning = tuning
+
+        self._pending = np.zeros(0, dtype=np.float32)  # samples not yet part of a full hop
+        self._unframed = np.zeros(0, dtype=np.float32)  # samples from the next STFT frame start on
+        self._last_sign = None
+        self._hops = collections.deque(maxlen=self.n_hops)  # samples and sums of the hops in the window
+        self.samples_seen = 0
+
+    def push(self, samples):
+        """Add samples; return a (stream_time_seconds, feature_vector) pair for every
+        completed hop once a full window has been seen"""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        self._pending = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+
+        vectors = []
+        while len(self._pending) >= self.hop_samples:
+            hop, self._pending = self._pending[:self.hop_samples], self._pending[self.hop_samples:]
+            self._add_hop(hop)
+            if len(self._hops) == self.n_hops:
+                vectors.append((self.samples_seen / self.sr, self._window_features()))
+        return vectors
+
+    def _add_hop(self, hop):
+        """Time-domain sums of the new hop, and the STFT frames its samples complete"""
+        hop64 = hop.astype(np.float64)
+        signs = np.sign(hop)
+        self._hops.append({
+            'index': self.samples_seen // self.hop_samples,
+            'samples': hop,
+            'abs': np.sum(np.abs(hop64)),
+            'sum': np.sum(hop64),
+            'sq': np.sum(hop64 ** 2),
+            'peak': float(np.max(np.abs(hop))),
+            'crossings': int(np.sum(np.diff(signs) > 0)),
+            # Sign change from the previous hop's last sample into this hop
+            'boundary': int(self._last_sign is not None and signs[0] - self._last_sign > 0),
+            'frames': 0,
+            'parts': [],  # per-frame values of the frames credited to this hop, before the dB floors
+            'db_max': np.full(len(DB_SCALES), -np.inf),
+            'db_min': np.full(len(DB_SCALES), np.inf),
+            'rows': None,  # (floors, sum of the frame rows, sum of their squares)
+            'power': [],
+            'pitches': [],
+            'magnitudes': [],
+            'chroma': (None, 0.0),  # (tuning, sum of chroma over the hop's frames)
+        })
+        self._last_sign = signs[-1]
+        first_frame_start = self.samples_seen - len(self._unframed)
+        self.samples_seen += len(hop)
+
+        # Uncentred frames completed by this hop; each is credited to the hop it starts in,
+        # since a window contains exactly the frames that start and end inside it
+        buffer = np.concatenate([self._unframed, hop])
+        n_frames = 0 if len(buffer) < N_FFT else 1 + (len(buffer) - N_FFT) // HOP_LENGTH
+        self._unframed = buffer[n_frames * HOP_LENGTH:]
+        if not n_frames:
+            return
+
+        frames = dsp.frame(buffer[:(n_frames - 1) * HOP_LENGTH + N_FFT], N_FFT, HOP_LENGTH)
+        parts, power = self._frame_parts(frames)
+        pitches, magnitudes = self._pitch_peaks(power)
+        hop_index = (first_frame_start + HOP_LENGTH * np.arange(n_frames)) // self.hop_samples
+        oldest = self._hops[0]['index']
+        for index in np.unique(hop_index[hop_index >= oldest]):
+            selected = hop_index == index
+            hop_parts = {name: values[:, selected] for name, values in parts.items()}
+            sums = self._hops[index - oldest]
+            sums['frames'] += int(np.sum(selected))
+            sums['parts'].append(hop_parts)
+            sums['db_max'] = np.maximum(sums['db_max'], [np.max(hop_parts[name]) for name in DB_SCALES])
+            sums['db_min'] = np.minimum(sums['db_min'], [np.min(hop_parts[name]) for name in DB_SCALES])
+            sums['rows'] = None
+            sums['power'].append(power[:, selected])
+            sums['pitches'].extend(pitches[i] for i in np.flatnonzero(selected))
+            sums['magnitudes'].extend(magnitudes[i] for i in np.flatnonzero(selected))
+            sums['chroma'] = (None, 0.0)
+
+    def _frame_parts(self, frames):
+        """Log-mel spectra, centroid/bandwidth/rolloff and contrast peak and valley dB of
+        (N_FFT, n_frames) raw frames, one column per frame and before the top_db floors,
+        and the frames' power spectra for chroma"""
+        magnitude = np.abs(np.fft.rfft(frames * self._fft_window[:, np.newaxis], axis=0))
+        power = magnitude ** 2
+        peak, valley = contrast_peaks_valleys(magnitude, self.sr)
+        parts = {
+            'log_mel': 10.0 * np.log10(np.maximum(1e-10, self._mel_basis @ power)),
+            'shape': np.vstack(spectral_shape(magnitude, self.sr)),
+            'peak_db': 10.0 * np.log10(np.maximum(1e-10, peak)),
+            'valley_db': 10.0 * np.log10(np.maximum(1e-10, valley)),
+        }
+        return parts, power
+
+    def _frame_rows(self, parts, floors):
+        """Per-frame MFCCs, centroid, bandwidth, rolloff and contrast, one row per
+        frame, with each dB scale floored at its entry of `floors`"""
+        log_mel, peak_db, valley_db = (np.maximum(parts[name], floor) for name, floor in zip(DB_SCALES, floors))
+        return np.vstack([self._dct @ log_mel, parts['shape'], peak_db - valley_db]).T
+
+    def _hop_sums(self, h, floors):
+        """Sum of a hop's frame rows and of their squares under `floors`; the cached
+        sums stand unless a floor that changed reaches the hop's quietest value"""
+        if h['rows'] is not None:
+            cached = h['rows'][0]
+            if np.all((cached == floors) | (h['db_min'] >= np.maximum(cached, floors))):
+                return h['rows'][1:]
+        if h['parts']:
+            parts = {name: np.concatenate([p[name] for p in h['parts']], axis=1) for name in h['parts'][0]}
+            rows = self._frame_rows(parts, floors)
+            h['rows'] = (floors, np.sum(rows, axis=0), np.sum(rows ** 2, axis=0))
+        else:
+            h['rows'] = (floors, 0.0, 0.0)
+        return h['rows'][1:]
+
+    def _pitch_peaks(self, power):
+        """Per-frame lists of the piptrack peaks (pitch, magnitude) that
+        estimate_tuning works from"""
+        if self.tuning is not None:
+            return [np.zeros(0)] * power.shape[1], [np.zeros(0)] * power.shape[1]
+        pitches, magnitudes = dsp.piptrack(power, self.sr, N_FFT)
+        peaks = [np.flatnonzero(column > 0) for column in pitches.T]
+        return ([column[i] for column, i in zip(pitches.T, peaks)],
+                [column[i] for column, i in zip(magnitudes.T, peaks)])
+
+    def _chroma(self, power, tuning):
+        """Sum over frames of the normalised chromagram"""
+        raw_chroma = chroma_filterbank(self.sr, N_FFT, tuning) @ power
+        return np.sum(dsp.normalize(raw_chroma, axis=0), axis=1)
+
+    def _window_chroma(self, edge_power):
+        """Mean chroma of the window, with tuning estimated over the whole window"""
+        tuning = self.tuning
+        if tuning is None:
+            edge_pitches, edge_magnitudes = self._pitch_peaks(edge_power)
+            pitches = np.concatenate(edge_pitches + [p for h in self._hops for p in h['pitches']])
+            magnitudes = np.concatenate(edge_magnitudes + [m for h in self._hops for m in h['magnitudes']])
+            threshold = np.median(magnitudes) if len(magnitudes) else 0.0
+            tuning = dsp.pitch_tuning(pitches[magnitudes >= threshold], bins_per_octave=12)
+        tuning = float(tuning)
+
+        total = self._chroma(edge_power, tuning)
+        for h in self._hops:
+            if h['chroma'][0] != tuning and h['power']:
+                h['chroma'] = (tuning, self._chroma(np.concatenate(h['power'], axis=1), tuning))
+            total = total + h['chroma'][1]
+        return total
+
+    def _edge_frames(self):
+        """The two zero-padded frames at each end of the window that a centred STFT adds"""
+        half = N_FFT // 2
+        head = np.concatenate([h['samples'] for h in _take_until(self._hops, half + HOP_LENGTH)])
+        tail = np.concatenate([h['samples'] for h in _take_until(reversed(self._hops), half + HOP_LENGTH)[::-1]])
+        frames = []
+        for pad in (half, half - HOP_LENGTH):
+            frames.append(np.concatenate([np.zeros(pad, dtype=np.float32), head[:N_FFT - pad]]))
+        for pad in (half - HOP_LENGTH, half):
+            frames.append(np.concatenate([tail[len(tail) - (N_FFT - pad):], np.zeros(pad, dtype=np.float32)]))
+        return self._frame_parts(np.stack(frames, axis=1))
+
+    def _window_features(self):
+        """Assemble the feature vector of the current window from the per-hop sums"""
+        hops = self._hops
+        n = self.window_samples
+        mean = sum(h['sum'] for h in hops) / n
+        std = np.sqrt(max(sum(h['sq'] for h in hops) / n - mean ** 2, 0.0))
+        peak = max(h['peak'] for h in hops)
+        # The first hop's boundary crossing points into audio that has left the window
+        crossings = sum(h['crossings'] for h in hops) + sum(h['boundary'] for h in list(hops)[1:])
+
+        edge_parts, edge_power = self._edge_frames()
+        # librosa's top_db floors: the loudest value of each dB scale in the window, less TOP_DB
+        edge_max = [np.max(edge_parts[name]) for name in DB_SCALES]
+        floors = np.max([h['db_max'] for h in hops] + [edge_max], axis=0) - TOP_DB
+        edges = self._frame_rows(edge_parts, floors)
+        hop_sums = [self._hop_sums(h, floors) for h in hops]
+
+        frames = sum(h['frames'] for h in hops) + len(edges)
+        chroma_mean = self._window_chroma(edge_power) / frames
+        frame_mean = (sum(s for s, _ in hop_sums) + np.sum(edges, axis=0)) / frames
+        frame_sq = (sum(sq for _, sq in hop_sums) + np.sum(edges ** 2, axis=0)) / frames
+        frame_std = np.sqrt(np.maximum(frame_sq - frame_mean ** 2, 0.0))
+
+        # Peak normalisation (dsp.normalize) scales the waveform by `gain`:
+        # amplitudes scale with it, the dB scale of the MFCCs shifts coefficient 0 only,
+        # and every other feature is scale-invariant
+        gain = 1.0 / peak if peak > np.finfo(np.float32).tiny else 1.0
+        mfcc_mean = frame_mean[:N_MFCC].copy()
+        mfcc_mean[0] += np.sqrt(self._mel_basis.shape[0]) * 20.0 * np.log10(gain)
+
+        shape_mean, shape_std = frame_mean[N_MFCC:N_MFCC + 3], frame_std[N_MFCC:N_MFCC + 3]
+        return np.concatenate([
+            [sum(h['abs'] for h in hops) / n * gain, std * gain, peak * gain, crossings / n],
+            mfcc_mean,
+            frame_std[:N_MFCC],
+            np.stack([shape_mean, shape_std], axis=-1).ravel(),
+            chroma_mean,
+            frame_mean[N_MFCC + 3:],
+        ])
+
+
+def _take_until(hops, n_samples):
+    """Leading hops that together hold at least n_samples samples"""
+    taken, count = [], 0
+    for h in hops:
+        if count >= n_samples:
+            break
+        taken.append(h)
+        count += len(h['samples'])
+    return taken
+
+
+def classify_stream(model, chunks, sr, class_names, window_seconds=5.0, hop_seconds=0.5):
+    """
+    Classify a stream of audio chunks every hop over a sliding window.
+    Yields (stream_time_seconds, {'predicted_class', 'probabilities'}).
+    The extractor produces full vectors; a model trained on a feature-family
+    subset is given just its columns.
+    """
+    from svm_.audio_io import StreamResampler
+    from svm_.classification import predict_features
+    from svm_.feature_engine import ANALYSIS_SR
+    from svm_.feature_extraction import model_families, select_families
+
+    # The stream is resampled to the analysis rate as it arrives
+    analysis_sr = ANALYSIS_SR or sr
+    resampler = StreamResampler(sr, analysis_sr)
+    extractor = StreamingFeatureExtractor(analysis_sr, window_seconds, hop_seconds)
+    families = model_families(model)
+    for chunk in chunks:
+        emitted = extractor.push(resampler.push(chunk))
+        if emitted:
+            features = select_families(np.array([vector for _, vector in emitted]), families)
+            results = predict_features(model, features, class_names)
+            for (stream_time, _), result in zip(emitted, results):
+                yield stream_time, result
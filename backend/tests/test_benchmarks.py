@@ -0,0 +1,12 @@
+from svm_.benchmarks.suite import compare_results
+
+
+def results(**values):
+    return {'meta': {}, 'metrics': {name: {'value': value, 'unit': 'ms', 'better': 'lower'}
+                                    for name, value in values.items()}}
+
+
+def test_compare_flags_slower_and_missing_metrics():
+    baseline = results(extract=1.0, fit=2.0, infer=3.0)
+    current = results(extract=1.1, fit=3.0, new=1.0)
+    assert sorted(compare_results(baseline, current, tolerance=0.2)) == ['fit', 'infer']
@@ -0,0 +1,24 @@
+import numpy as np
+
+from svm_.benchmarks.cold_start import bench_cold_start
+from svm_.compiled_model import compile_pipeline
+from svm_.model_artifact import save_artifact
+from svm_.svm_model import make_pipeline
+
+
+def test_runtime_import_loads_no_heavy_modules():
+    passed, results = bench_cold_start(repeat=1)
+    assert results['heavy_modules'] == []
+    assert passed
+
+
+def test_loading_and_warming_up_a_model_loads_no_heavy_modules(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 55))
+    y = np.arange(60) % 3
+    pipeline = make_pipeline().set_params(svm__C=1.0, svm__gamma='scale').fit(X, y)
+    save_artifact(compile_pipeline(pipeline), str(tmp_path / 'svm_model.bin'))
+
+    passed, results = bench_cold_start(str(tmp_path), repeat=1)
+    assert results['heavy_modules'] == []
+    assert passed
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from svm_.compiled_model import compile_pipeline
+from svm_.model_artifact import load_artifact, save_artifact
+from svm_.svm_model import make_pipeline
+
+
+def fitted_pipeline(kernel, n_classes, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(scale=3.0, size=(n_classes, 12))
+    y = np.repeat(np.arange(n_classes), 30)
+    X = centres[y] + rng.normal(size=(len(y), 12))
+    labels = np.array(['normal', 'early_fault', 'failure'])[y]
+    pipeline = make_pipeline().set_params(svm__kernel=kernel, svm__C=1.0, svm__gamma='scale')
+    pipeline.fit(X, labels)
+    X_test = centres[rng.integers(n_classes, size=40)] + rng.normal(scale=1.5, size=(40, 12))
+    return pipeline, X_test
+
+
+def assert_matches(model, pipeline, X):
+    np.testing.assert_array_equal(model.predict(X), pipeline.predict(X))
+    np.testing.assert_allclose(model.predict_proba(X), pipeline.predict_proba(X), atol=1e-6)
+    # Single rows take the scalar pairwise-coupling path
+    np.testing.assert_allclose(model.predict_proba(X[:1]), pipeline.predict_proba(X[:1]), atol=1e-6)
+
+
+@pytest.mark.parametrize('kernel', ['rbf', 'poly'])
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_compiled_matches_sklearn(kernel, n_classes):
+    pipeline, X = fitted_pipeline(kernel, n_classes)
+    assert_matches(compile_pipeline(pipeline), pipeline, X)
+
+
+@pytest.mark.parametrize('kernel', ['rbf', 'poly'])
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_artifact_round_trip_matches_sklearn(kernel, n_classes, tmp_path):
+    pipeline, X = fitted_pipeline(kernel, n_classes)
+    path = str(tmp_path / 'svm_model.bin')
+    save_artifact(compile_pipeline(pipeline), path)
+    assert_matches(load_artifact(path), pipeline, X)
+
+
+@pytest.mark.parametrize('approximation', ['nystroem', 'rff'])
+@pytest.mark.parametrize('n_classes', [2, 3])
+@pytest.mark.parametrize('calibrated', [False, True])
+def test_large_scale_artifact_matches_sklearn(approximation, n_classes, calibrated, tmp_path):
+    from svm_.large_scale import array_chunks, train_large_scale
+
+    rng = np.random.default_rng(0)
+    centres = rng.normal(scale=3.0, size=(n_classes, 12))
+    y = np.repeat(np.arange(n_classes), 40)
+    X = centres[y] + rng.normal(size=(len(y), 12))
+    model = train_large_scale(array_chunks(X, y, chunk_size=32), classes=np.arange(n_classes),
+                              approximation=approximation, n_components=50,
+                              calibration_every=4 if calibrated else len(y) + 1)
+    assert hasattr(model, 'calibrated_classifiers_') == calibrated
+
+    save_artifact(compile_pipeline(model), str(tmp_path / 'large_scale_model.bin'))
+    loaded = load_artifact(str(tmp_path / 'large_scale_model.bin'))
+    X_test = centres[rng.integers(n_classes, size=40)] + rng.normal(scale=1.5, size=(40, 12))
+    np.testing.assert_array_equal(loaded.predict(X_test), model.predict(X_test))
+    np.testing.assert_allclose(loaded.predict_proba(X_test), model.predict_proba(X_test), atol=1e-6)
@@ -0,0 +1,53 @@
+import numpy as np
+
+from svm_.feature_cache import FeatureCache
+
+DIM = 4
+
+
+def small_cache(directory, n_slots=2):
+    return FeatureCache(str(directory), max_bytes=n_slots * DIM * 4)
+
+
+def vector(value):
+    return np.full(DIM, value, dtype=np.float64)
+
+
+def test_round_trip(tmp_path):
+    with small_cache(tmp_path) as cache:
+        cache.put('a', vector(1))
+    np.testing.assert_array_equal(small_cache(tmp_path).get('a'), vector(1))
+
+
+def test_slot_reused_without_flush_is_a_miss(tmp_path):
+    with small_cache(tmp_path) as cache:
+        cache.put('a', vector(1))
+        cache.put('b', vector(2))
+
+    # A run that evicts 'a' and stops before flushing: the index on disk still maps 'a' to its old slot
+    crashed = small_cache(tmp_path)
+    crashed.get('b')
+    crashed.put('c', vector(3))
+    assert 'a' not in crashed
+    del crashed
+
+    cache = small_cache(tmp_path)
+    assert 'a' in cache
+    assert cache.get('a') is None
+    assert 'a' not in cache
+    np.testing.assert_array_equal(cache.get('b'), vector(2))
+    assert cache.get('c') is None
+
+
+def test_runs_sharing_a_directory_never_serve_each_others_vectors(tmp_path):
+    with small_cache(tmp_path) as cache:
+        cache.put('a', vector(1))
+
+    first, second = small_cache(tmp_path), small_cache(tmp_path)
+    first.put('b', vector(2))
+    second.put('c', vector(3))  # same free slot as 'b'
+    first.flush()
+
+    cache = small_cache(tmp_path)
+    assert cache.get('b') is None
+    np.testing.assert_array_equal(cache.get('a'), vector(1))
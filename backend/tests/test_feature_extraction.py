@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from svm_.dataset_simulation import simulate_early_fault_sound, simulate_failure_sound, simulate_normal_sound
+from svm_.feature_extraction import extract_features, extract_features_batch, extract_features_reference
+
+# The shared-spectrogram engine is not bit-identical to librosa; the largest
+# relative difference measured on real clips is ~2e-6
+RTOL = 1e-5
+ATOL = 1e-6
+
+
+def simulated_clips(sr, seconds, seed=0):
+    clips = []
+    for simulate in (simulate_normal_sound, simulate_early_fault_sound, simulate_failure_sound):
+        np.random.seed(seed)
+        audio, _ = simulate(seconds, sr)
+        clips.append((audio.astype(np.float32), sr))
+    return clips
+
+
+@pytest.mark.parametrize('sr, seconds', [(22050, 2), (22050, 5), (16000, 3), (44100, 1)])
+def test_extract_features_matches_reference(sr, seconds):
+    clips = simulated_clips(sr, seconds)
+    expected = np.array(extract_features_reference(clips))
+    np.testing.assert_allclose(extract_features(clips), expected, rtol=RTOL, atol=ATOL)
+
+
+def test_batched_extraction_matches_reference():
+    # Different lengths share a zero-padded batch; padding must not leak into the statistics
+    clips = simulated_clips(22050, 3) + simulated_clips(22050, 2, seed=1)
+    expected = np.array(extract_features_reference(clips))
+    np.testing.assert_allclose(extract_features_batch(clips, bucket_seconds=10), expected, rtol=RTOL, atol=ATOL)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from joblib import dump
+
+from svm_.compiled_model import compile_pipeline
+from svm_.model_artifact import ArtifactMismatch, save_artifact
+from svm_.runtime import load_model
+from svm_.svm_model import make_pipeline
+
+
+def fitted_pipeline():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 55))
+    return make_pipeline().set_params(svm__C=1.0, svm__gamma='scale').fit(X, np.arange(60) % 3)
+
+
+def test_loads_the_artifact(tmp_path):
+    save_artifact(compile_pipeline(fitted_pipeline()), str(tmp_path / 'svm_model.bin'))
+    dump(fitted_pipeline(), tmp_path / 'svm_model.joblib')
+    assert load_model(str(tmp_path)).model_version is not None
+
+
+def test_pickled_model_needs_opt_in(tmp_path):
+    dump(fitted_pipeline(), tmp_path / 'svm_model.joblib')
+    with pytest.raises(ValueError, match="No svm_model.bin"):
+        load_model(str(tmp_path))
+    with pytest.raises(ValueError, match="not a model artifact"):
+        load_model(str(tmp_path / 'svm_model.joblib'))
+    assert hasattr(load_model(str(tmp_path), allow_pickle=True), 'predict_with_proba')
+
+
+def test_pickled_model_with_a_stale_fingerprint_is_refused(tmp_path):
+    model = fitted_pipeline()
+    model.feature_fingerprint = 'stale'
+    dump(model, tmp_path / 'svm_model.joblib')
+    with pytest.raises(ArtifactMismatch):
+        load_model(str(tmp_path), allow_pickle=True)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from svm_.dataset_simulation import simulate_normal_sound
+from svm_.feature_extraction import extract_features
+from svm_.streaming import StreamingFeatureExtractor
+
+SR = 22050
+
+
+def low_pass(audio, cutoff):
+    spectrum = np.fft.rfft(audio)
+    spectrum[np.fft.rfftfreq(len(audio), 1 / SR) > cutoff] = 0
+    return np.fft.irfft(spectrum, len(audio)).astype(np.float32)
+
+
+def clip(kind, seconds=6):
+    np.random.seed(0)
+    audio = simulate_normal_sound(seconds, SR)[0].astype(np.float32)
+    if kind == 'noise':
+        return (0.1 * np.random.default_rng(0).standard_normal(seconds * SR)).astype(np.float32)
+    if kind == 'low_passed':
+        return low_pass(audio, 4000)
+    if kind == 'gapped':
+        audio[3 * SR:int(3.8 * SR)] = 0
+        return audio
+    if kind == 'gapped_low_passed':
+        audio[3 * SR:int(3.8 * SR)] = 0
+        return low_pass(audio, 2000)
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize('kind', ['noise', 'low_passed', 'gapped', 'gapped_low_passed'])
+def test_stream_matches_extract_features(kind):
+    audio = clip(kind)
+    extractor = StreamingFeatureExtractor(SR, window_seconds=2.0, hop_seconds=0.5)
+    emitted = []
+    for start in range(0, len(audio), 3000):
+        emitted += extractor.push(audio[start:start + 3000])
+    assert len(emitted) == 8
+
+    for stream_time, vector in emitted:
+        end = int(round(stream_time * SR))
+        expected = extract_features([(audio[end - extractor.window_samples:end], SR)])[0]
+        # Above a low-pass cutoff the spectrum is FFT round-off, which sits above the
+        # contrast floor, so those contrast bands differ by tenths of a dB
+        np.testing.assert_allclose(vector, expected, rtol=1e-2, atol=0.5)
@@ -1,4 +1,7 @@
 import argparse
+import json
+import queue
+import threading
 import requests
 import sounddevice as sd
 from scipy.io.wavfile import write
@@ -10,6 +13,7 @@ from datetime import datetime
 
 # Define the server URL
 url = "http://127.0.0.1:8001/"
+ws_url = "ws://127.0.0.1:8001/ws/stream"
 color = {'normal': 'Green', 'early_fault':'Yellow', 'failure':'Red'}
 audio_folder = "/Users/kehindeelelu/Documents/aimechanics/dataset/recorded_audio"
 
@@ -32,6 +36,35 @@ def record_audio(duration=5, sample_rate=44100):
     print("Recording complete.")
     return audio_data, sample_rate
 
+# Stream microphone audio to the server and print a classification every hop
+def stream_audio(sample_rate=44100, window=5.0, hop=0.5):
+    from websockets.sync.client import connect
+
+    blocks = queue.Queue()
+
+    def on_audio(indata, frames, time_info, status):
+        if status:
+            print(status)
+        blocks.put(indata.copy().tobytes())
+
+    with connect(f"{ws_url}?sample_rate={sample_rate}&dtype=int16&window={window}&hop={hop}") as ws:
+        def print_results():
+            for message in ws:
+                result = json.loads(message)
+                predicted_class = result["prediction"]["predicted_class"]
+                print(f"[{result['time']:8.2f}s] Predicted class: {predicted_class} ({color.get(predicted_class)})")
+
+        threading.Thread(target=print_results, daemon=True).start()
+
+        print("Streaming... press Ctrl+C to stop.")
+        with sd.InputStream(samplerate=sample_rate, channels=1, dtype='int16',
+                            blocksize=int(sample_rate * hop / 4), callback=on_audio):
+            try:
+                while True:
+                    ws.send(blocks.get())
+            except KeyboardInterrupt:
+                print("Streaming stopped.")
+
 # Save the recorded audio to a specific audio_folder
 def save_audio_to_folder(audio_data, sample_rate, audio_folder, filename="recorded_audio.wav"):
     os.makedirs(audio_folder, exist_ok=True)
@@ -74,15 +107,19 @@ def send_color_to_bulb(color):
 if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Audio classification client.")
-    parser.add_argument("--mode", choices=["file_path", "file_upload"], required=True, help="Mode of operation: 'file_path' or 'file_upload'")
+    parser.add_argument("--mode", choices=["file_path", "file_upload", "stream"], required=True, help="Mode of operation: 'file_path', 'file_upload' or 'stream'")
     args = parser.parse_args()
-    mode_extract = args.mode # 'file_path' || 'file_upload'
+    mode_extract = args.mode # 'file_path' || 'file_upload' || 'stream'
 
     ############# Main Logic #############
     try: 
-        # Record audio for 5 seconds
-        audio_data, sample_rate = record_audio(duration=5)
-        print("Audio data shape:", audio_data.shape, sample_rate)
+        if mode_extract == "stream":
+            # Continuous monitoring over a WebSocket instead of fixed 5-second recordings
+            stream_audio()
+        else:
+            # Record audio for 5 seconds
+            audio_data, sample_rate = record_audio(duration=5)
+            print("Audio data shape:", audio_data.shape, sample_rate)
 
         if mode_extract == "file_path":
             # Save the audio to the specified audio_folder with a unique filename
@@ -128,4 +165,5 @@ if __name__ == "__main__":
 
 # call the file 
 # python webservice/front_end.py --mode file_path
-# python webservice/front_end.py --mode file_upload
\ No newline at end of file
+# python webservice/front_end.py --mode file_upload
+# python webservice/front_end.py --mode stream
\ No newline at end of file